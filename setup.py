@@ -7,6 +7,8 @@ setup(
     install_requires=[
         "Flask==2.3.3",
         "gunicorn==21.2.0",
+        "numpy>=1.20",
+        "uvicorn>=0.20",
     ],
     author="Syed Jawwad",
     description="A comprehensive Python application for managing student performance data",
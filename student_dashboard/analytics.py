@@ -0,0 +1,137 @@
+import warnings
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from config import SUBJECTS, MAX_MARKS_PER_SUBJECT, ANALYTICS_BATCH_SIZE
+
+# Vectorized cohort statistics over a columnar marks matrix.
+# Marks are held as float32 (float64 when they come from a StudentTable) with shape
+# (subjects, students), so every subject is one contiguous row and each statistic is a
+# single NumPy call along axis 1.
+
+def load_marks(manager, batch_size: int = ANALYTICS_BATCH_SIZE) -> np.ndarray:
+    capacity = max(manager.count_students(), 1)
+    marks = np.empty((len(SUBJECTS), capacity), dtype=np.float32)
+    filled = 0
+    for batch in manager.iter_mark_batches(batch_size):
+        # None (a missing mark) becomes NaN
+        block = np.array(batch, dtype=np.float32).T
+        if filled + block.shape[1] > capacity:
+            # Rows were added since the count was taken
+            capacity = max(capacity * 2, filled + block.shape[1])
+            grown = np.empty((len(SUBJECTS), capacity), dtype=np.float32)
+            grown[:, :filled] = marks[:, :filled]
+            marks = grown
+        marks[:, filled:filled + block.shape[1]] = block
+        filled += block.shape[1]
+    return np.ascontiguousarray(marks[:, :filled])
+
+class CohortAnalytics:
+    def __init__(self, marks: np.ndarray, subjects: Sequence[str] = SUBJECTS):
+        marks = np.asarray(marks)
+        # Either float width is used as is, so a snapshot's marks stay a view of the file
+        self.marks = np.ascontiguousarray(marks, dtype=marks.dtype if marks.dtype in (np.float32, np.float64) else np.float32)
+        self.subjects = list(subjects)
+        if self.marks.ndim != 2 or self.marks.shape[0] != len(self.subjects):
+            raise ValueError(f"Expected a ({len(self.subjects)}, students) marks matrix, got {self.marks.shape}")
+        self._has_missing = bool(np.isnan(self.marks).any())
+
+    @classmethod
+    def from_manager(cls, manager, batch_size: int = ANALYTICS_BATCH_SIZE) -> 'CohortAnalytics':
+        return cls(load_marks(manager, batch_size))
+
+    @classmethod
+    def from_table(cls, table) -> 'CohortAnalytics':
+        # A memory-mapped snapshot stores marks subject-major, so this is a view, not a copy
+        return cls(table.marks.T)
+
+    @property
+    def count(self) -> int:
+        return self.marks.shape[1]
+
+    def _reduce(self, plain, nan_aware, *args, **kwargs) -> np.ndarray:
+        if self.count == 0:
+            return np.zeros(len(self.subjects))
+        if not self._has_missing:
+            return np.asarray(plain(self.marks, *args, axis=1, **kwargs), dtype=np.float64)
+        with warnings.catch_warnings():
+            # A subject with no marks at all yields NaN rather than a warning
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.asarray(nan_aware(self.marks, *args, axis=1, **kwargs), dtype=np.float64)
+
+    def means(self) -> np.ndarray:
+        # Accumulate in float64 so large cohorts do not lose precision
+        return self._reduce(np.mean, np.nanmean, dtype=np.float64)
+
+    def stds(self) -> np.ndarray:
+        return self._reduce(np.std, np.nanstd, dtype=np.float64)
+
+    def medians(self) -> np.ndarray:
+        return self._reduce(np.median, np.nanmedian)
+
+    def minimums(self) -> np.ndarray:
+        return self._reduce(np.min, np.nanmin)
+
+    def maximums(self) -> np.ndarray:
+        return self._reduce(np.max, np.nanmax)
+
+    def percentiles(self, q: Sequence[float]) -> np.ndarray:
+        # Shape (len(q), subjects)
+        if self.count == 0:
+            return np.zeros((len(q), len(self.subjects)))
+        if not self._has_missing:
+            return np.percentile(self.marks, list(q), axis=1).astype(np.float64)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanpercentile(self.marks, list(q), axis=1).astype(np.float64)
+
+    def histograms(self, bins: int = 10, max_marks: float = MAX_MARKS_PER_SUBJECT) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (edges, counts) with counts shaped (subjects, bins) over 0..max_marks."""
+        edges = np.linspace(0, max_marks, bins + 1)
+        # Bin every mark at once; the top edge is closed like np.histogram
+        index = np.floor(self.marks * bins / max_marks)
+        index = np.clip(index, 0, bins - 1)
+        valid = ~np.isnan(self.marks) & (self.marks >= 0) & (self.marks <= max_marks)
+        offsets = np.arange(len(self.subjects))[:, None] * bins
+        flat = (index + offsets)[valid].astype(np.int64)
+        counts = np.bincount(flat, minlength=len(self.subjects) * bins).reshape(len(self.subjects), bins)
+        return edges, counts
+
+    def correlations(self) -> np.ndarray:
+        """Pearson correlation between every pair of subjects, shape (subjects, subjects)."""
+        marks = self.marks
+        if self._has_missing:
+            marks = marks[:, ~np.isnan(marks).any(axis=0)]
+        if marks.shape[1] < 2:
+            return np.full((len(self.subjects), len(self.subjects)), np.nan)
+        with warnings.catch_warnings():
+            # A subject where everyone scored the same has no defined correlation
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.corrcoef(marks.astype(np.float64))
+
+    def subject_summary(self, percentiles: Sequence[float] = (25, 75)) -> List[Dict[str, Any]]:
+        columns = {
+            'mean': self.means(),
+            'std': self.stds(),
+            'median': self.medians(),
+            'minimum': self.minimums(),
+            'maximum': self.maximums()
+        }
+        bounds = self.percentiles(percentiles)
+        summary = []
+        for i, subject in enumerate(self.subjects):
+            row: Dict[str, Any] = {'subject': subject}
+            row.update({key: float(values[i]) for key, values in columns.items()})
+            row['percentiles'] = {q: float(bounds[j][i]) for j, q in enumerate(percentiles)}
+            summary.append(row)
+        return summary
+
+def correlation_pairs(analytics: CohortAnalytics, top: Optional[int] = None) -> List[Tuple[str, str, float]]:
+    # Distinct subject pairs, strongest relationship first
+    matrix = analytics.correlations()
+    pairs = []
+    for i in range(len(analytics.subjects)):
+        for j in range(i + 1, len(analytics.subjects)):
+            if not np.isnan(matrix[i, j]):
+                pairs.append((analytics.subjects[i], analytics.subjects[j], float(matrix[i, j])))
+    pairs.sort(key=lambda pair: abs(pair[2]), reverse=True)
+    return pairs[:top] if top else pairs
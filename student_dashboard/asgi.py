@@ -0,0 +1,130 @@
+"""
+Student Performance Management System - ASGI Entry Point
+Serves the Flask dashboard from an asyncio event loop:
+
+    uvicorn asgi:app --workers 2
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+
+The loop holds every open connection cheaply while a bounded thread pool runs the
+Flask views, so SQLite work and template rendering never exceed ASGI_WORKER_THREADS
+at once no matter how many viewers are connected.
+"""
+
+import asyncio
+import io
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import ASGI_WORKER_THREADS
+
+class WSGIToASGI:
+    """Runs a WSGI application for ASGI HTTP requests on a bounded executor."""
+
+    def __init__(self, wsgi_app: Callable, max_workers: int = ASGI_WORKER_THREADS,
+                 on_shutdown: Optional[Callable[[], None]] = None):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='asgi-wsgi')
+        self.on_shutdown = on_shutdown
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            body = await self._read_body(receive)
+            loop = asyncio.get_running_loop()
+
+            def send_from_thread(message: Dict[str, Any]) -> None:
+                # Blocks the worker thread until the loop has sent the chunk: streamed
+                # exports are paced by the client instead of piling up in memory
+                asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+            await loop.run_in_executor(self.executor, self._run_wsgi, scope, body, send_from_thread)
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                if self.on_shutdown:
+                    self.on_shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _read_body(receive: Callable) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        return b''.join(chunks)
+
+    @staticmethod
+    def build_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for raw_name, raw_value in scope.get('headers', []):
+            name = raw_name.decode('latin-1').upper().replace('-', '_')
+            value = raw_value.decode('latin-1')
+            if name == 'CONTENT_TYPE' or name == 'CONTENT_LENGTH':
+                key = name
+            else:
+                key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def _run_wsgi(self, scope: Dict[str, Any], body: bytes, send: Callable[[Dict[str, Any]], None]) -> None:
+        response: Dict[str, Any] = {}
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+            if exc_info and response.get('started'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+        def start() -> None:
+            if not response.get('started'):
+                send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+                response['started'] = True
+
+        result = self.wsgi_app(self.build_environ(scope, body), start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    start()
+                    send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            start()
+            send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+from web_app import app as flask_app, manager
+
+app = WSGIToASGI(flask_app, on_shutdown=manager.close)
@@ -0,0 +1,371 @@
+"""
+Student Performance Management System - Benchmark Suite
+Times StudentManager, the import/export paths and the Flask routes on synthetic cohorts
+and writes the results as JSON so runs from different versions can be compared.
+
+    python benchmarks.py --sizes 1000 100000 --output before.json
+    python benchmarks.py compare before.json after.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from helpers import grade_students
+from models import StudentManager
+from database import init_db, student_to_row
+from analytics import CohortAnalytics
+from snapshot import open_snapshot
+from config import SUBJECTS, MAX_MARKS_PER_SUBJECT, TOTAL_MAX_MARKS
+
+DEFAULT_SIZES = [1000, 100000, 1000000, 10000000]
+# Benchmarks that hold the whole cohort in Python objects are skipped above this size
+DEFAULT_MAX_MATERIALIZE = 1000000
+BATCH_SIZE = 100  # students per add_students / update_many / delete_many call
+
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'William',
+               'Elizabeth', 'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah',
+               'Ahmed', 'Fatima', 'Wei', 'Mei', 'Carlos', 'Sofia', 'Ivan', 'Olga', 'Kwame', 'Amara']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+              'Martinez', 'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Taylor', 'Thomas', 'Moore', 'Khan',
+              'Chen', 'Wang', 'Singh', 'Kumar', 'Ivanov', 'Mensah', 'Okafor', 'Silva', 'Rossi', 'Jawwad']
+
+def generate_cohort(size: int, seed: int = 42, start_roll_no: int = 1,
+                    chunk_size: int = 100000) -> Iterator[Dict[str, Any]]:
+    """Yield synthetic students shaped like the records in data.json."""
+    rng = np.random.default_rng(seed)
+    for offset in range(0, size, chunk_size):
+        n = min(chunk_size, size - offset)
+        marks = np.round(rng.normal(65, 18, size=(n, len(SUBJECTS))).clip(0, MAX_MARKS_PER_SUBJECT))
+        firsts = rng.integers(0, len(FIRST_NAMES), size=n)
+        lasts = rng.integers(0, len(LAST_NAMES), size=n)
+        ages = rng.integers(15, 26, size=n)
+        genders = rng.choice(['M', 'F', 'O'], size=n, p=[0.49, 0.49, 0.02])
+        totals, percentages, grades = grade_students(marks, TOTAL_MAX_MARKS)
+        for i, (student_marks, total, percentage, grade) in enumerate(zip(
+                marks.tolist(), totals.tolist(), percentages.tolist(), grades.tolist())):
+            yield {
+                'roll_no': start_roll_no + offset + i,
+                'name': f"{FIRST_NAMES[firsts[i]]} {LAST_NAMES[lasts[i]]}",
+                'age': int(ages[i]),
+                'gender': str(genders[i]),
+                'marks': student_marks,
+                'total': total,
+                'percentage': percentage,
+                'grade': grade
+            }
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        'repeat': repeat,
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'mean_s': statistics.mean(timings)
+    }
+
+def measure_memory(fn: Callable[[], Any]) -> Dict[str, Any]:
+    """Bytes still allocated by fn's result, and the peak while building it."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {'retained_bytes': retained, 'peak_bytes': peak}
+
+class BenchmarkRun:
+    def __init__(self, size: int, workdir: str, max_materialize: int, repeat: int):
+        self.size = size
+        self.workdir = workdir
+        self.max_materialize = max_materialize
+        # Fast operations are repeated; whole-table operations run fewer times on big cohorts
+        self.repeat = repeat
+        self.heavy_repeat = repeat if size <= 100000 else 1
+        self.results: List[Dict[str, Any]] = []
+        self.db_path = os.path.join(workdir, f'students_{size}.db')
+        self.manager: Optional[StudentManager] = None
+
+    def record(self, group: str, name: str, fn: Callable[[], Any], heavy: bool = False,
+               materializes: bool = False) -> None:
+        entry = {'size': self.size, 'group': group, 'benchmark': name}
+        if materializes and self.size > self.max_materialize:
+            entry['skipped'] = f"loads the whole cohort into memory (size > {self.max_materialize})"
+        else:
+            entry.update(measure(fn, self.heavy_repeat if heavy else self.repeat))
+        self.results.append(entry)
+        status = entry.get('skipped') or f"{entry['median_s'] * 1000:.2f} ms"
+        print(f"  [{self.size}] {group}.{name}: {status}", file=sys.stderr)
+
+    def record_memory(self, name: str, fn: Callable[[], Any]) -> None:
+        entry = {'size': self.size, 'group': 'memory', 'benchmark': name}
+        if self.size > self.max_materialize:
+            entry['skipped'] = f"loads the whole cohort into memory (size > {self.max_materialize})"
+        else:
+            entry.update(measure_memory(fn))
+        self.results.append(entry)
+        status = entry.get('skipped') or f"{entry['retained_bytes'] / 2 ** 20:.1f} MiB retained"
+        print(f"  [{self.size}] memory.{name}: {status}", file=sys.stderr)
+
+    def fresh_manager(self, name: str) -> StudentManager:
+        path = os.path.join(self.workdir, f'{name}_{self.size}.db')
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+        init_db(path)
+        return StudentManager(path)
+
+    def populate(self) -> None:
+        init_db(self.db_path)
+        self.manager = StudentManager(self.db_path)
+        rows = (student_to_row(student) for student in generate_cohort(self.size))
+        entry = {'size': self.size, 'group': 'setup', 'benchmark': 'bulk_import.generated'}
+        entry.update(measure(lambda: self.manager.bulk_import(rows), 1))
+        self.results.append(entry)
+
+    def run_manager(self) -> None:
+        manager = self.manager
+        middle = self.size // 2 + 1
+        new_roll_nos = iter(range(self.size + 1, self.size + 1 + 10 * self.repeat))
+        added: List[int] = []
+        sample = next(generate_cohort(1, seed=1))
+
+        def add_student():
+            roll_no = next(new_roll_nos)
+            manager.add_student(dict(sample, roll_no=roll_no))
+            added.append(roll_no)
+
+        def delete_student():
+            manager.delete_student(added.pop())
+
+        # Batch writes use roll numbers past those taken by add_student
+        batch_roll_nos = itertools.count(self.size + 1 + 10 * self.repeat)
+        batches: List[List[int]] = []
+
+        def add_students():
+            roll_nos = list(itertools.islice(batch_roll_nos, BATCH_SIZE))
+            manager.add_students([dict(sample, roll_no=roll_no) for roll_no in roll_nos])
+            batches.append(roll_nos)
+
+        def update_many():
+            manager.update_many([{'roll_no': roll_no, 'age': 21} for roll_no in range(middle, middle + BATCH_SIZE)])
+
+        def delete_many():
+            manager.delete_many(batches.pop())
+
+        deep_cursor = manager.get_students_page(sort_key='total', descending=True,
+                                                page_size=max(self.size // 2, 1))['next_cursor']
+
+        self.record('manager', 'get_student', lambda: manager.get_student(middle))
+        self.record('manager', 'add_student', add_student)
+        self.record('manager', 'update_student', lambda: manager.update_student(middle, {'age': 20}))
+        self.record('manager', 'delete_student', delete_student)
+        self.record('manager', 'add_students.batch', add_students)
+        self.record('manager', 'update_many.batch', update_many)
+        self.record('manager', 'delete_many.batch', delete_many)
+        self.record('manager', 'count_students', manager.count_students)
+        self.record('manager', 'statistics_snapshot', manager.statistics_snapshot)
+        self.record('manager', 'get_statistics', manager.get_statistics)
+        self.record('manager', 'find_highest_scorer', manager.find_highest_scorer)
+        self.record('manager', 'calculate_subject_averages', manager.calculate_subject_averages)
+        self.record('manager', 'calculate_subject_statistics', manager.calculate_subject_statistics, heavy=True)
+        self.record('manager', 'get_students_page.first', lambda: manager.get_students_page())
+        self.record('manager', 'get_students_page.deep_by_total',
+                    lambda: manager.get_students_page(sort_key='total', descending=True, after=deep_cursor))
+        self.record('manager', 'summarize_students.filtered', lambda: manager.summarize_students(grade='B', gender='F'),
+                    heavy=True)
+        self.record('manager', 'search.name_substring', lambda: manager.search(name='hnso'))
+        self.record('manager', 'search.name_prefix', lambda: manager.search(name='Mar', prefix=True))
+        self.record('manager', 'search.ranges', lambda: manager.search(gender='F', min_age=18, max_age=19,
+                                                                      min_percentage=90))
+        self.record('manager', 'get_all_students', manager.get_all_students, heavy=True, materializes=True)
+        self.record('manager', 'regrade.unchanged', manager.regrade, heavy=True)
+        self.record('manager', 'analytics.load_and_summarize',
+                    lambda: CohortAnalytics.from_manager(manager).subject_summary(), heavy=True)
+
+    def run_memory(self) -> None:
+        manager = self.manager
+        self.record_memory('get_all_students.table', manager.get_all_students)
+        self.record_memory('iter_students.dicts', lambda: list(manager.iter_students()))
+        self.record_memory('analytics.marks_matrix', lambda: CohortAnalytics.from_manager(manager))
+
+    def run_io(self) -> None:
+        manager = self.manager
+        csv_path = os.path.join(self.workdir, f'students_{self.size}.csv')
+        json_path = os.path.join(self.workdir, f'students_{self.size}.json')
+        ndjson_path = os.path.join(self.workdir, f'students_{self.size}.ndjson')
+        snapshot_path = os.path.join(self.workdir, f'students_{self.size}.snap')
+        self.record('io', 'export_csv', lambda: manager.export_csv(csv_path), heavy=True)
+        self.record('io', 'export_ndjson', lambda: manager.export_ndjson(ndjson_path), heavy=True)
+        self.record('io', 'save_data', lambda: manager.save_data(json_path), heavy=True)
+        # save_snapshot() builds the whole table first; without it there is no snapshot to read back
+        self.record('io', 'save_snapshot', lambda: manager.save_snapshot(snapshot_path), heavy=True,
+                    materializes=True)
+        self.record('io', 'open_snapshot.analytics',
+                    lambda: CohortAnalytics.from_table(open_snapshot(snapshot_path)).subject_summary(), heavy=True,
+                    materializes=True)
+        # The first sync stores every row's content hash; the timed ones then find nothing to write
+        manager.sync_csv(csv_path)
+        self.record('io', 'sync_csv.unchanged', lambda: manager.sync_csv(csv_path), heavy=True)
+
+        def import_into_empty(method: str, path: str, **kwargs: Any) -> Callable[[], Any]:
+            def run():
+                target = self.fresh_manager(f'import_{method}')
+                try:
+                    getattr(target, method)(path, **kwargs)
+                finally:
+                    target.close()
+            return run
+
+        self.record('io', 'import_csv', import_into_empty('import_csv', csv_path, workers=1), heavy=True)
+        self.record('io', 'import_csv.parallel',
+                    import_into_empty('import_csv', csv_path, workers=max(os.cpu_count() or 1, 2)), heavy=True)
+        self.record('io', 'import_json', import_into_empty('import_json', json_path), heavy=True)
+        self.record('io', 'import_csv.upsert_existing', lambda: manager.import_csv(csv_path), heavy=True)
+        self.record('io', 'import_snapshot', import_into_empty('import_snapshot', snapshot_path), heavy=True,
+                    materializes=True)
+        for path in (csv_path, json_path, ndjson_path, snapshot_path):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def run_web(self) -> None:
+        import web_app
+        previous = web_app.manager
+        web_app.manager = self.manager
+        client = web_app.app.test_client()
+        middle = self.size // 2 + 1
+        try:
+            def get(url: str, cached: bool = False) -> Callable[[], Any]:
+                def run():
+                    if not cached:
+                        # Every repeat renders the page, rather than timing page cache hits
+                        web_app.page_cache.clear()
+                    response = client.get(url)
+                    response.get_data()
+                    assert response.status_code == 200, (url, response.status_code)
+                return run
+
+            self.record('web', 'GET /', get('/'))
+            self.record('web', 'GET /display', get('/display'))
+            self.record('web', 'GET /display?sort=total', get('/display?sort=total&order=desc'))
+            self.record('web', 'GET /statistics', get('/statistics'), heavy=True)
+            self.record('web', 'GET /analytics', get('/analytics'), heavy=True)
+            self.record('web', 'GET /search?name', get('/search?name=Smith&grade=A'))
+            # The same pages served from the page cache, warmed by one request first
+            for url in ('/display', '/statistics', '/analytics', '/search?name=Smith&grade=A'):
+                client.get(url)
+                self.record('web', f'GET {url.split("=")[0]} (cached)', get(url, cached=True))
+            self.record('web', 'POST /search', lambda: client.post('/search', data={'roll_no': str(middle)}).get_data())
+            self.record('web', 'GET /edit/<roll_no>', get(f'/edit/{middle}'))
+            self.record('web', 'GET /export.csv', get('/export.csv'), heavy=True)
+            self.record('web', 'GET /export.ndjson', get('/export.ndjson'), heavy=True)
+        finally:
+            web_app.manager = previous
+
+    def run(self) -> List[Dict[str, Any]]:
+        print(f"Benchmarking {self.size} students", file=sys.stderr)
+        self.populate()
+        try:
+            self.run_manager()
+            self.run_memory()
+            self.run_io()
+            self.run_web()
+        finally:
+            self.manager.close()
+        return self.results
+
+def run_benchmarks(sizes: List[int], max_materialize: int = DEFAULT_MAX_MATERIALIZE,
+                   repeat: int = 5, workdir: Optional[str] = None) -> Dict[str, Any]:
+    own_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix='student_bench_')
+    results: List[Dict[str, Any]] = []
+    try:
+        for size in sizes:
+            results.extend(BenchmarkRun(size, workdir, max_materialize, repeat).run())
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'sizes': sizes
+        },
+        'results': results
+    }
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Pair up benchmarks by (size, group, name) and flag ones slower than threshold x baseline."""
+    def index(report):
+        return {(r['size'], r['group'], r['benchmark']): r for r in report['results'] if 'median_s' in r}
+
+    before, after = index(baseline), index(candidate)
+    rows = []
+    for key in sorted(before.keys() & after.keys()):
+        ratio = after[key]['median_s'] / before[key]['median_s'] if before[key]['median_s'] else float('inf')
+        rows.append({'size': key[0], 'group': key[1], 'benchmark': key[2],
+                     'baseline_s': before[key]['median_s'], 'candidate_s': after[key]['median_s'],
+                     'ratio': ratio, 'regression': ratio > threshold})
+    return rows
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the student dashboard")
+    subparsers = parser.add_subparsers(dest='command')
+    run_parser = subparsers.add_parser('run', help="run the benchmarks (default)")
+    compare_parser = subparsers.add_parser('compare', help="compare two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=1.2,
+                                help="flag benchmarks whose median grew by more than this factor")
+    for p in (parser, run_parser):
+        p.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+        p.add_argument('--repeat', type=int, default=5)
+        p.add_argument('--max-materialize', type=int, default=DEFAULT_MAX_MATERIALIZE)
+        p.add_argument('--workdir', help="directory for the generated databases (default: a temp dir)")
+        p.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.candidate) as f:
+            candidate = json.load(f)
+        rows = compare(baseline, candidate, args.threshold)
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+        return 1 if any(row['regression'] for row in rows) else 0
+
+    report = run_benchmarks(args.sizes, args.max_materialize, args.repeat, args.workdir)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
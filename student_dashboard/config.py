@@ -5,4 +5,26 @@ DATABASE_PATH = os.path.join(os.path.dirname(__file__), 'students.db')
 LOG_FILE = os.path.join(os.path.dirname(__file__), 'app.log')
 SUBJECTS = ['Math', 'Science', 'English', 'History', 'Art']
 MAX_MARKS_PER_SUBJECT = 100
+MARK_COLUMNS = [subject.lower().replace(' ', '_') for subject in SUBJECTS]  # one students column per subject
 TOTAL_MAX_MARKS = len(SUBJECTS) * MAX_MARKS_PER_SUBJECT
+GRADES = ['A+', 'A', 'B', 'C', 'D', 'F']
+GENDERS = {'M': 'Male', 'F': 'Female', 'O': 'Other'}
+DB_TIMEOUT = 5.0  # seconds to wait on a locked database
+DB_STATEMENT_CACHE_SIZE = 256  # prepared statements kept per pooled connection
+PAGE_SIZE = 50  # students per page in paginated listings
+MAX_PAGE_SIZE = 500  # upper bound for the per_page query parameter
+EXPORT_BATCH_SIZE = 1000  # rows fetched and written per chunk when streaming exports
+IMPORT_CHUNK_SIZE = 50000  # rows per executemany() batch during bulk imports
+BULK_CACHE_SIZE = -65536  # page cache during bulk imports (negative = KiB, so 64 MiB)
+SEARCH_LIMIT = 100  # maximum rows returned by a multi-criteria search
+ANALYTICS_BATCH_SIZE = 10000  # rows fetched per batch when loading marks for analytics
+ASGI_WORKER_THREADS = 16  # threads running Flask requests per ASGI worker (each holds one SQLite connection)
+PAGE_CACHE_SIZE = 256  # rendered web pages kept per process (0 disables the cache)
+GUI_PAGE_SIZE = 100  # rows fetched per page as the GUI display tab scrolls
+GUI_WINDOW_PAGES = 5  # pages kept in the GUI display tree; rows beyond are dropped and refetched
+TASK_POLL_INTERVAL = 100  # milliseconds between GUI checks on background tasks
+INGEST_WORKERS = 1  # processes parsing a CSV import; more than 1 parses large files in parallel
+INGEST_CHUNK_BYTES = 8 * 1024 * 1024  # bytes of CSV each worker parses per task
+INGEST_QUEUE_CHUNKS = 2  # parsed chunks queued per worker ahead of the database writer
+READ_REPLICA = False  # serve StudentManager reads from an in-memory copy of the database
+REPLICA_REFRESH_INTERVAL = 1.0  # seconds between checks for writes made by other processes
@@ -1,53 +1,653 @@
+import argparse
+import hashlib
+import itertools
+import os
 import sqlite3
 import json
-from config import DATABASE_PATH, SUBJECTS
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config import (DATABASE_PATH, SUBJECTS, MARK_COLUMNS, DB_TIMEOUT, DB_STATEMENT_CACHE_SIZE, IMPORT_CHUNK_SIZE,
+                    REPLICA_REFRESH_INTERVAL)
+from jsonstream import iter_json_records
 
-def create_tables():
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
+
+class _ThreadConnection:
+    # Lives only in a thread's local storage; collected when the thread exits
+    __slots__ = ('conn', '__weakref__')
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+class ConnectionPool:
+    """Hands out one long-lived SQLite connection per thread and per process.
+
+    A thread's connection is closed when the thread exits, so short-lived
+    worker threads do not leave open handles behind.
+    """
+
+    def __init__(self, db_path: str = DATABASE_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[int, sqlite3.Connection] = {}
+        self._keys = itertools.count()
+        self._pid = os.getpid()
+        self.owners = 0  # get_pool() references not yet given back with release_pool()
+
+    def _open(self) -> sqlite3.Connection:
+        # check_same_thread is off only so close_all() and thread-exit cleanup can run from
+        # any thread; each connection is still used by the thread that opened it.
+        conn = sqlite3.connect(self.db_path, timeout=DB_TIMEOUT,
+                               cached_statements=DB_STATEMENT_CACHE_SIZE,
+                               check_same_thread=False)
+        if self.db_path != ':memory:':
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _release(self, key: int) -> None:
+        with self._lock:
+            conn = self._connections.pop(key, None)
+        if conn is not None:
+            conn.close()
+
+    def connection(self) -> sqlite3.Connection:
+        if os.getpid() != self._pid:
+            # Forked worker: never share the parent's handles, just forget them.
+            with self._lock:
+                self._connections = {}
+                self._pid = os.getpid()
+            self._local = threading.local()
+        held = getattr(self._local, 'held', None)
+        if held is None:
+            conn = self._open()
+            key = next(self._keys)
+            with self._lock:
+                self._connections[key] = conn
+            held = self._local.held = _ThreadConnection(conn)
+            weakref.finalize(held, self._release, key)
+        return held.conn
+
+    def close_all(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        # Outside the lock: dropping the old locals runs _release(), which takes it
+        self._local = threading.local()
+        for conn in connections.values():
+            conn.close()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path: str = DATABASE_PATH) -> ConnectionPool:
+    """Return the pool shared by every user of ``db_path``; pair each call with release_pool()."""
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = ConnectionPool(db_path)
+        pool.owners += 1
+        return pool
+
+def release_pool(pool: ConnectionPool) -> None:
+    # Only the last owner closes the connections; the others may still be using them
+    with _pools_lock:
+        pool.owners -= 1
+        if pool.owners > 0:
+            return
+        if _pools.get(pool.db_path) is pool:
+            del _pools[pool.db_path]
+    pool.close_all()
+
+class ReadReplica:
+    """In-memory copy of a database for readers, filled with the SQLite backup API.
+
+    Each refresh copies the database into a new shared-cache in-memory
+    database (a generation) and swaps it in, so reads never touch the disk or
+    wait on disk writers. Every thread keeps one connection to the generation
+    it last used and moves to the newest one on its next read. Writes made
+    through this process call mark_stale() and the next read refreshes first,
+    so a burst of writes costs one copy and readers still see every write
+    that has returned. Writes from other processes are picked up once the
+    data version on disk is seen to change, checked at most every
+    ``refresh_interval`` seconds.
+    """
+
+    def __init__(self, db_path: str = DATABASE_PATH, refresh_interval: float = REPLICA_REFRESH_INTERVAL):
+        self.db_path = db_path
+        self.refresh_interval = refresh_interval
+        self._name = f"replica-{os.getpid()}-{id(self)}"
+        self._refresh_lock = threading.Lock()  # one backup at a time
+        self._swap_lock = threading.Lock()  # guards the current generation and its anchor
+        self._local = threading.local()
+        self._generation = 0
+        self._anchor: Optional[sqlite3.Connection] = None  # keeps the current generation alive
+        self._version: Optional[int] = None  # data version the current generation holds
+        self._checked_at = 0.0
+        self._stale = True
+        self._pid = os.getpid()
+
+    def _open(self, generation: int) -> sqlite3.Connection:
+        return sqlite3.connect(f"file:{self._name}-{generation}?mode=memory&cache=shared", uri=True,
+                               cached_statements=DB_STATEMENT_CACHE_SIZE, check_same_thread=False)
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._version
+
+    def refresh(self, source: sqlite3.Connection) -> None:
+        """Copy ``source`` (a connection to the on-disk database) into a new generation."""
+        with self._refresh_lock:
+            self._copy(source)
+
+    def mark_stale(self) -> None:
+        self._stale = True
+
+    def _copy(self, source: sqlite3.Connection) -> None:
+        # Cleared before copying, so a write that lands during the backup marks it again
+        self._stale = False
+        generation = self._generation + 1
+        target = self._open(generation)
+        source.backup(target)
+        row = target.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+        with self._swap_lock:
+            previous, self._anchor = self._anchor, target
+            self._generation = generation
+            self._version = row[0] if row else 0
+            self._checked_at = time.monotonic()
+        if previous is not None:
+            # The old copy is freed once the last reader moves to the new generation
+            previous.close()
+
+    def _due(self) -> bool:
+        return self._stale or time.monotonic() - self._checked_at >= self.refresh_interval
+
+    def refresh_if_stale(self, source: sqlite3.Connection) -> None:
+        if not self._due():
+            return
+        # Only an interval check lets readers carry on with the current copy while another thread
+        # refreshes; after a local write they wait, so nobody misses a write that has returned
+        if not self._refresh_lock.acquire(blocking=self._stale):
+            return
+        try:
+            if not self._due():
+                return
+            row = source.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+            if self._stale or (row[0] if row else 0) != self._version:
+                self._copy(source)
+            else:
+                self._checked_at = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+    def connection(self, source: Callable[[], sqlite3.Connection]) -> sqlite3.Connection:
+        """Return this thread's replica connection; ``source`` supplies the disk connection for refreshes."""
+        if os.getpid() != self._pid:
+            # Forked worker: the parent's in-memory databases are not usable here
+            with self._swap_lock:
+                self._local = threading.local()
+                self._anchor, self._version, self._generation, self._stale = None, None, 0, True
+                self._name = f"replica-{os.getpid()}-{id(self)}"
+                self._pid = os.getpid()
+        self.refresh_if_stale(source())
+        local = self._local
+        if getattr(local, 'generation', None) != self._generation:
+            with self._swap_lock:
+                # Opened under the lock so the generation cannot be dropped in between
+                conn = self._open(self._generation)
+                generation = self._generation
+            conn.execute("PRAGMA query_only = ON")
+            # The old connection is not closed here: a cursor still streaming from it
+            # keeps it open, and it closes itself once nothing refers to it
+            local.conn, local.generation = conn, generation
+        return local.conn
+
+    def close(self) -> None:
+        with self._swap_lock:
+            anchor, self._anchor, self._version, self._stale = self._anchor, None, None, True
+            self._local = threading.local()
+        if anchor is not None:
+            anchor.close()
+
+# Column order shared by every query that reads or writes a whole student row
+STUDENT_COLUMNS = ['roll_no', 'name', 'age', 'gender'] + MARK_COLUMNS + ['total', 'percentage', 'grade']
+
+def student_to_row(student: Dict[str, Any]) -> Tuple[Any, ...]:
+    marks = list(student['marks'])
+    if len(marks) != len(SUBJECTS):
+        raise ValueError(f"Expected {len(SUBJECTS)} marks, got {len(marks)}")
+    return (student['roll_no'], student['name'], student['age'], student['gender'],
+            *marks, student['total'], student['percentage'], student['grade'])
+
+def row_hash(row: Tuple[Any, ...]) -> bytes:
+    """Content hash of a row in STUDENT_COLUMNS order, ignoring whether numbers arrived as int or float."""
+    roll_no, name, age, gender, *numbers, grade = row
+    normalized = [name, None if age is None else int(age), gender,
+                  [None if value is None else float(value) for value in numbers], grade]
+    return hashlib.blake2b(json.dumps(normalized, separators=(',', ':')).encode(), digest_size=16).digest()
+
+_PLACEHOLDERS = ', '.join('?' * len(STUDENT_COLUMNS))
+_UPDATE_COLUMNS = ', '.join(f'{column} = excluded.{column}' for column in STUDENT_COLUMNS[1:])
+
+# Insert-or-update that fires UPDATE triggers, unlike INSERT OR REPLACE which silently deletes.
+# The content hash is cleared because the row no longer matches the feed it came from.
+UPSERT_STUDENT = (
+    f"INSERT INTO students ({', '.join(STUDENT_COLUMNS)}) VALUES ({_PLACEHOLDERS}) "
+    f"ON CONFLICT(roll_no) DO UPDATE SET {_UPDATE_COLUMNS}, row_hash = NULL"
+)
+
+# Sync imports store each row's hash and skip the write, and every trigger, when it matches
+SYNC_UPSERT_STUDENT = (
+    f"INSERT INTO students ({', '.join(STUDENT_COLUMNS)}, row_hash) VALUES ({_PLACEHOLDERS}, ?) "
+    f"ON CONFLICT(roll_no) DO UPDATE SET {_UPDATE_COLUMNS}, row_hash = excluded.row_hash "
+    f"WHERE students.row_hash IS NOT excluded.row_hash"
+)
+
+def _create_students_table(conn: sqlite3.Connection) -> None:
+    mark_columns = ''.join(f"            {column} REAL,\n" for column in MARK_COLUMNS)
+    conn.execute(f'''
         CREATE TABLE IF NOT EXISTS students (
             roll_no INTEGER PRIMARY KEY,
             name TEXT NOT NULL,
             age INTEGER,
             gender TEXT,
-            marks TEXT,  -- JSON string for marks list
-            total REAL,
+{mark_columns}            total REAL,
             percentage REAL,
             grade TEXT
         )
     ''')
-    conn.commit()
-    conn.close()
 
-def migrate_from_json(json_file='data.json'):
+# Back the ORDER BY of every sortable listing; roll_no rides along as the rowid
+# and the equality and range filters of search()
+INDEXED_COLUMNS = ['name', 'age', 'gender', 'total', 'percentage', 'grade']
+
+def create_indexes(conn: sqlite3.Connection) -> None:
+    for column in INDEXED_COLUMNS:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_students_{column} ON students ({column})")
+
+def drop_indexes(conn: sqlite3.Connection) -> None:
+    # Bulk loads rebuild indexes once at the end instead of updating them per row
+    for column in INDEXED_COLUMNS:
+        conn.execute(f"DROP INDEX IF EXISTS idx_students_{column}")
+
+# Running sums kept in step with students by triggers, so statistics never scan the table
+STAT_SUM_COLUMNS = ['age', 'total', 'percentage'] + MARK_COLUMNS
+GROUP_DIMENSIONS = ['grade', 'gender']
+_STATS_TRIGGERS = ['students_stats_insert', 'students_stats_delete', 'students_stats_update']
+
+def _create_statistics_tables(conn: sqlite3.Connection) -> None:
+    sums = ''.join(f"            {column}_sum REAL NOT NULL DEFAULT 0,\n" for column in STAT_SUM_COLUMNS)
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS student_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+{sums}            student_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS student_group_counts (
+            dimension TEXT NOT NULL,  -- 'grade' or 'gender'
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, value)
+        ) WITHOUT ROWID
+    ''')
+
+def _statistics_delta(row: str, sign: str) -> str:
+    sums = ', '.join(f"{column}_sum = {column}_sum {sign} COALESCE({row}.{column}, 0)" for column in STAT_SUM_COLUMNS)
+    statements = [f"UPDATE student_stats SET student_count = student_count {sign} 1, {sums} WHERE id = 1;"]
+    for dimension in GROUP_DIMENSIONS:
+        statements.append(
+            f"INSERT INTO student_group_counts (dimension, value, count) "
+            f"VALUES ('{dimension}', COALESCE({row}.{dimension}, ''), {sign}1) "
+            f"ON CONFLICT(dimension, value) DO UPDATE SET count = count {sign} 1;"
+        )
+    return '\n            '.join(statements)
+
+def create_statistics_triggers(conn: sqlite3.Connection) -> None:
+    bodies = {
+        'students_stats_insert': ('AFTER INSERT', _statistics_delta('NEW', '+')),
+        'students_stats_delete': ('AFTER DELETE', _statistics_delta('OLD', '-')),
+        'students_stats_update': ('AFTER UPDATE', _statistics_delta('OLD', '-') + '\n            ' + _statistics_delta('NEW', '+')),
+    }
+    for name in _STATS_TRIGGERS:
+        event, body = bodies[name]
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {name} {event} ON students BEGIN
+            {body}
+            END
+        ''')
+
+def drop_statistics_triggers(conn: sqlite3.Connection) -> None:
+    for name in _STATS_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+def rebuild_statistics(conn: sqlite3.Connection) -> None:
+    sums = ', '.join(f"COALESCE(SUM({column}), 0)" for column in STAT_SUM_COLUMNS)
+    columns = ', '.join(f"{column}_sum" for column in STAT_SUM_COLUMNS)
+    conn.execute("DELETE FROM student_stats")
+    conn.execute(f"INSERT INTO student_stats (id, {columns}, student_count) SELECT 1, {sums}, COUNT(*) FROM students")
+    conn.execute("DELETE FROM student_group_counts")
+    for dimension in GROUP_DIMENSIONS:
+        conn.execute(f'''
+            INSERT INTO student_group_counts (dimension, value, count)
+            SELECT '{dimension}', COALESCE({dimension}, ''), COUNT(*) FROM students GROUP BY 2
+        ''')
+
+# Trigram full-text index over names: substring and prefix search without a table scan
+_FTS_TRIGGERS = ['students_fts_insert', 'students_fts_delete', 'students_fts_update']
+
+def create_name_index(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS students_fts
+            USING fts5(name, content='students', content_rowid='roll_no', tokenize='trigram')
+        ''')
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5 or older than 3.34; search() falls back to LIKE
+        return False
+    return True
+
+def has_name_index(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'students_fts'"
+    ).fetchone()[0] > 0
+
+def create_name_index_triggers(conn: sqlite3.Connection) -> None:
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students BEGIN
+            INSERT INTO students_fts (rowid, name) VALUES (NEW.roll_no, NEW.name);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students BEGIN
+            INSERT INTO students_fts (students_fts, rowid, name) VALUES ('delete', OLD.roll_no, OLD.name);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE OF name ON students BEGIN
+            INSERT INTO students_fts (students_fts, rowid, name) VALUES ('delete', OLD.roll_no, OLD.name);
+            INSERT INTO students_fts (rowid, name) VALUES (NEW.roll_no, NEW.name);
+        END
+    ''')
+
+def drop_name_index_triggers(conn: sqlite3.Connection) -> None:
+    for name in _FTS_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+# Counter bumped by every write to students; API ETags are derived from it
+_VERSION_TRIGGERS = {'students_version_insert': 'AFTER INSERT',
+                     'students_version_delete': 'AFTER DELETE',
+                     'students_version_update': 'AFTER UPDATE'}
+
+def _create_data_version_table(conn: sqlite3.Connection) -> None:
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
+
+def create_version_triggers(conn: sqlite3.Connection) -> None:
+    for name, event in _VERSION_TRIGGERS.items():
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {name} {event} ON students BEGIN
+                UPDATE data_version SET version = version + 1 WHERE id = 1;
+            END
+        ''')
+
+def drop_version_triggers(conn: sqlite3.Connection) -> None:
+    for name in _VERSION_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+def student_count(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT student_count FROM student_stats WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+def bump_data_version(conn: sqlite3.Connection) -> None:
+    conn.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+
+def drop_derived_structures(conn: sqlite3.Connection) -> None:
+    # Bulk loads skip per-row index and trigger work, then rebuild everything once
+    drop_indexes(conn)
+    drop_statistics_triggers(conn)
+    drop_name_index_triggers(conn)
+    drop_version_triggers(conn)
+
+def build_derived_structures(conn: sqlite3.Connection) -> None:
+    create_indexes(conn)
+    rebuild_statistics(conn)
+    create_statistics_triggers(conn)
+    if has_name_index(conn):
+        conn.execute("INSERT INTO students_fts (students_fts) VALUES ('rebuild')")
+        create_name_index_triggers(conn)
+    # One bump stands in for the per-row ones skipped while the triggers were dropped
+    bump_data_version(conn)
+    create_version_triggers(conn)
+
+_CHUNK_ROWS = "SELECT roll_no FROM temp.bulk_chunk_keys"
+
+def _apply_chunk_statistics(conn: sqlite3.Connection, sign: str) -> None:
+    # Adds (or with '-' removes) the chunk's rows in students to the running sums in one pass
+    sums = ', '.join(f"COALESCE(SUM({column}), 0)" for column in STAT_SUM_COLUMNS)
+    row = conn.execute(f"SELECT COUNT(*), {sums} FROM students WHERE roll_no IN ({_CHUNK_ROWS})").fetchone()
+    updates = ', '.join(f"{column}_sum = {column}_sum {sign} ?" for column in STAT_SUM_COLUMNS)
+    conn.execute(f"UPDATE student_stats SET student_count = student_count {sign} ?, {updates} WHERE id = 1", row)
+    for dimension in GROUP_DIMENSIONS:
+        conn.execute(f'''
+            INSERT INTO student_group_counts (dimension, value, count)
+            SELECT '{dimension}', COALESCE({dimension}, ''), {sign}COUNT(*) FROM students
+            WHERE roll_no IN ({_CHUNK_ROWS}) GROUP BY 2
+            ON CONFLICT(dimension, value) DO UPDATE SET count = count + excluded.count
+        ''')
+
+def upsert_chunk(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+    """Upsert rows into a populated table, doing the trigger work once per chunk instead of per row.
+
+    The statistics, search and version triggers are dropped for the
+    duration; the chunk's old rows are taken out of the running totals and
+    the name index, the rows are written, and the new ones are added back
+    with set-based statements. Indexes are still updated row by row. Must
+    run inside the caller's transaction, so no one sees the triggers missing.
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_chunk_keys (roll_no INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM temp.bulk_chunk_keys")
+    conn.executemany("INSERT OR IGNORE INTO temp.bulk_chunk_keys (roll_no) VALUES (?)", ((row[0],) for row in rows))
+    name_index = has_name_index(conn)
+    drop_statistics_triggers(conn)
+    drop_name_index_triggers(conn)
+    drop_version_triggers(conn)
+    _apply_chunk_statistics(conn, '-')
+    if name_index:
+        conn.execute(f"INSERT INTO students_fts (students_fts, rowid, name) "
+                     f"SELECT 'delete', roll_no, name FROM students WHERE roll_no IN ({_CHUNK_ROWS})")
+    conn.executemany(UPSERT_STUDENT, rows)
+    _apply_chunk_statistics(conn, '+')
+    if name_index:
+        conn.execute(f"INSERT INTO students_fts (rowid, name) "
+                     f"SELECT roll_no, name FROM students WHERE roll_no IN ({_CHUNK_ROWS})")
+        create_name_index_triggers(conn)
+    create_statistics_triggers(conn)
+    bump_data_version(conn)
+    create_version_triggers(conn)
+
+def missing_derived_structures(conn: sqlite3.Connection) -> List[str]:
+    """Name the indexes and triggers that a bulk load dropped and never rebuilt."""
+    expected = [f"idx_students_{column}" for column in INDEXED_COLUMNS] + _STATS_TRIGGERS + list(_VERSION_TRIGGERS)
+    if has_name_index(conn):
+        expected += _FTS_TRIGGERS
+    present = {name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = 'students'")}
+    return [name for name in expected if name not in present]
+
+def repair_derived_structures(conn: sqlite3.Connection) -> bool:
+    """Rebuild the derived structures if an interrupted bulk load left any missing."""
+    if not missing_derived_structures(conn):
+        return False
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        # Checked again under the write lock; a concurrent load may have finished meanwhile
+        if not missing_derived_structures(conn):
+            return False
+        drop_derived_structures(conn)
+        build_derived_structures(conn)
+    return True
+
+def migrate_marks_column(conn: sqlite3.Connection) -> bool:
+    """Rewrite a legacy table that keeps marks as a JSON string into per-subject columns."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(students)")]
+    if 'marks' not in columns:
+        return False
+    conn.execute("ALTER TABLE students RENAME TO students_legacy")
+    _create_students_table(conn)
+    insert = f"INSERT INTO students ({', '.join(STUDENT_COLUMNS)}) VALUES ({_PLACEHOLDERS})"
+    legacy = conn.execute("SELECT roll_no, name, age, gender, marks, total, percentage, grade FROM students_legacy")
+    rows = []
+    for roll_no, name, age, gender, marks_json, total, percentage, grade in legacy:
+        marks = json.loads(marks_json) if marks_json else []
+        marks = (list(marks) + [None] * len(SUBJECTS))[:len(SUBJECTS)]
+        rows.append((roll_no, name, age, gender, *marks, total, percentage, grade))
+    conn.executemany(insert, rows)
+    conn.execute("DROP TABLE students_legacy")
+    return True
+
+def _migrate_students_table(conn: sqlite3.Connection) -> None:
+    _create_students_table(conn)
+    if migrate_marks_column(conn):
+        print("Migrated marks to per-subject columns.")
+
+def _migrate_statistics(conn: sqlite3.Connection) -> None:
+    _create_statistics_tables(conn)
+    rebuild_statistics(conn)
+    create_statistics_triggers(conn)
+
+def _migrate_name_index(conn: sqlite3.Connection) -> None:
+    if create_name_index(conn):
+        conn.execute("INSERT INTO students_fts (students_fts) VALUES ('rebuild')")
+        create_name_index_triggers(conn)
+
+def _migrate_data_version(conn: sqlite3.Connection) -> None:
+    _create_data_version_table(conn)
+    create_version_triggers(conn)
+
+def _migrate_row_hash(conn: sqlite3.Connection) -> None:
+    # Existing rows start without a hash, so the first sync import rewrites them once
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(students)")]
+    if 'row_hash' not in columns:
+        conn.execute("ALTER TABLE students ADD COLUMN row_hash BLOB")
+
+# Ordered schema migrations. Append new steps with the next version number; never edit
+# or reorder applied ones. Steps use IF NOT EXISTS so databases created before
+# versioning existed are adopted without losing data.
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, 'students table with per-subject mark columns', _migrate_students_table),
+    (2, 'sort and filter indexes', create_indexes),
+    (3, 'trigger-maintained statistics', _migrate_statistics),
+    (4, 'trigram name index', _migrate_name_index),
+    (5, 'data version counter', _migrate_data_version),
+    (6, 'row content hashes for sync imports', _migrate_row_hash),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def _create_schema_version_table(conn: sqlite3.Connection) -> None:
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    has_table = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()[0]
+    if not has_table:
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def migrate(db_path: str = DATABASE_PATH) -> List[int]:
+    """Apply pending migrations in one transaction and return the versions applied.
+
+    An up-to-date database also gets any indexes and triggers rebuilt that a
+    bulk load killed part way through left behind.
+    """
+    conn = sqlite3.connect(db_path, timeout=DB_TIMEOUT)
     try:
-        with open(json_file, 'r') as f:
-            students = json.load(f)
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        for student in students:
-            cursor.execute('''
-                INSERT OR REPLACE INTO students (roll_no, name, age, gender, marks, total, percentage, grade)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                student['roll_no'],
-                student['name'],
-                student['age'],
-                student['gender'],
-                json.dumps(student['marks']),
-                student['total'],
-                student['percentage'],
-                student['grade']
-            ))
-        conn.commit()
+        if schema_version(conn) >= SCHEMA_VERSION:
+            repair_derived_structures(conn)
+            return []
+        applied = []
+        with conn:
+            # IMMEDIATE takes the write lock up front, so concurrent init runs apply each step once
+            conn.execute("BEGIN IMMEDIATE")
+            _create_schema_version_table(conn)
+            current = schema_version(conn)
+            for version, description, step in MIGRATIONS:
+                if version <= current:
+                    continue
+                step(conn)
+                conn.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                             (version, description))
+                applied.append(version)
+        return applied
+    finally:
         conn.close()
-        print("Migration from JSON to SQLite completed.")
-    except FileNotFoundError:
-        print("No JSON file found, starting fresh.")
-    except Exception as e:
-        print(f"Migration error: {e}")
-
-# Initialize database
-create_tables()
-migrate_from_json()
+
+def migrate_from_json(json_file: str = 'data.json', db_path: str = DATABASE_PATH) -> int:
+    """Upsert the students in a data.json (or NDJSON) file; returns how many were read.
+
+    Records are parsed incrementally and written in chunks inside one
+    transaction, so memory stays bounded however large the file is.
+    """
+    rows = (student_to_row(student) for student in iter_json_records(json_file))
+    count = 0
+    conn = sqlite3.connect(db_path, timeout=DB_TIMEOUT)
+    try:
+        with conn:
+            while True:
+                chunk = list(itertools.islice(rows, IMPORT_CHUNK_SIZE))
+                if not chunk:
+                    break
+                conn.executemany(UPSERT_STUDENT, chunk)
+                count += len(chunk)
+    finally:
+        conn.close()
+    return count
+
+def init_db(db_path: str = DATABASE_PATH, json_file: Optional[str] = None) -> List[int]:
+    applied = migrate(db_path)
+    if json_file:
+        migrate_from_json(json_file, db_path)
+    return applied
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage the student database schema")
+    parser.add_argument('command', choices=['init', 'version'])
+    parser.add_argument('--db', default=DATABASE_PATH, help="database file (default: %(default)s)")
+    parser.add_argument('--from-json', metavar='FILE', help="also import students from a data.json or NDJSON file")
+    args = parser.parse_args(argv)
+
+    if args.command == 'version':
+        conn = sqlite3.connect(args.db)
+        try:
+            print(f"Schema version {schema_version(conn)} (latest {SCHEMA_VERSION})")
+        finally:
+            conn.close()
+        return
+    applied = migrate(args.db)
+    if applied:
+        print(f"Applied migrations {', '.join(map(str, applied))}; schema is at version {SCHEMA_VERSION}.")
+    else:
+        print(f"Schema is up to date (version {SCHEMA_VERSION}).")
+    if args.from_json:
+        try:
+            count = migrate_from_json(args.from_json, args.db)
+            print(f"Imported {count} students from {args.from_json}.")
+        except FileNotFoundError:
+            print(f"No JSON file found at {args.from_json}.")
+
+if __name__ == "__main__":
+    main()
@@ -5,24 +5,39 @@ Tkinter-based graphical user interface for student management using SQLite
 
 import tkinter as tk
 from tkinter import messagebox, filedialog, ttk
+import multiprocessing
 import sys
 import os
+from collections import deque
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from helpers import (
     calculate_percentage, assign_grade, calculate_total, validate_name
 )
 from models import StudentManager
-from config import SUBJECTS, MAX_MARKS_PER_SUBJECT, TOTAL_MAX_MARKS
+from tasks import BackgroundTask, TaskRunner
+from database import init_db
+from analytics import CohortAnalytics, correlation_pairs
+from config import (SUBJECTS, MAX_MARKS_PER_SUBJECT, TOTAL_MAX_MARKS, GRADES, GENDERS, GUI_PAGE_SIZE, GUI_WINDOW_PAGES,
+                    TASK_POLL_INTERVAL)
+
+# Display column -> indexed ORDER BY key. Grades follow percentage, since text order
+# would put 'A+' after 'A'.
+DISPLAY_SORT_KEYS = {'Name': 'name', 'Roll No': 'roll_no', 'Age': 'age', 'Gender': 'gender',
+                     'Total': 'total', 'Percentage': 'percentage', 'Grade': 'percentage'}
 
 class StudentDashboardApp:
     def __init__(self):
         self.manager = StudentManager()
-        self.students = self.manager.get_all_students()
         self.root = tk.Tk()
         self.root.title("Student Performance Dashboard")
         self.root.geometry("1200x800")
         self.root.configure(bg='#f0f0f0')
+        self.root.protocol("WM_DELETE_WINDOW", self.quit)
+
+        # Database and file work runs here so the mainloop never blocks
+        self.task_runner = TaskRunner()
+        self.active_tasks = []  # (task, on_success, on_cancel) polled from the Tk thread
 
         # Set ttk style
         self.style = ttk.Style()
@@ -44,7 +59,7 @@ class StudentDashboardApp:
         self.root.grid_columnconfigure(0, weight=1)
         self.toolbar.grid(row=0, column=0, sticky='ew')
         self.tab_control.grid(row=1, column=0, sticky='nsew')
-        self.status_bar.grid(row=2, column=0, sticky='ew')
+        self.status_frame.grid(row=2, column=0, sticky='ew')
 
         # Initial load
         self.display_students()
@@ -59,10 +74,11 @@ class StudentDashboardApp:
         file_menu.add_command(label="Save Data", command=self.save_data)
         file_menu.add_command(label="Export to JSON", command=self.export_json)
         file_menu.add_command(label="Import from JSON", command=self.import_json)
+        file_menu.add_command(label="Export to NDJSON", command=self.export_ndjson)
         file_menu.add_command(label="Export to CSV", command=self.export_csv)
         file_menu.add_command(label="Import from CSV", command=self.import_csv)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
+        file_menu.add_command(label="Exit", command=self.quit)
 
         view_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="View", menu=view_menu)
@@ -214,7 +230,7 @@ class StudentDashboardApp:
 
         tk.Label(controls_frame, text="Filter by Grade:", bg='#f8f9fa').pack(side="left", padx=5)
         self.grade_filter_var = tk.StringVar(value="All")
-        grade_combo = ttk.Combobox(controls_frame, textvariable=self.grade_filter_var, values=["All", "A", "B", "C", "D", "F"], state="readonly", width=5)
+        grade_combo = ttk.Combobox(controls_frame, textvariable=self.grade_filter_var, values=["All"] + GRADES, state="readonly", width=5)
         grade_combo.pack(side="left", padx=5)
         grade_combo.bind("<<ComboboxSelected>>", lambda e: self.display_students())
 
@@ -226,11 +242,19 @@ class StudentDashboardApp:
 
         ttk.Button(controls_frame, text="Refresh", command=self.display_students).pack(side="right", padx=5)
 
+        # Virtual display state: only a sliding window of pages is materialized in the tree
+        self.display_pages = deque()  # (page, item ids) from top to bottom
+        self.display_query = {}
+        self.display_sort = ('Roll No', False)  # (column, descending), applied by ORDER BY
+        self.display_total = 0
+        self.display_average = 0.0
+        self.display_loading = False
+
         # Create Treeview with more columns
         columns = ('Name', 'Roll No', 'Age', 'Gender', 'Total', 'Percentage', 'Grade')
         self.display_tree = ttk.Treeview(tab, columns=columns, show='headings', height=15)
         for col in columns:
-            self.display_tree.heading(col, text=col, command=lambda c=col: self.sort_treeview(c))
+            self.display_tree.heading(col, text=col, command=lambda c=col: self.sort_display(c))
             if col == 'Name':
                 self.display_tree.column(col, width=150)
             elif col == 'Roll No':
@@ -247,6 +271,7 @@ class StudentDashboardApp:
                 self.display_tree.column(col, width=50)
 
         # Configure tags for grade-based coloring
+        self.display_tree.tag_configure('A+', background='lightgreen')
         self.display_tree.tag_configure('A', background='lightgreen')
         self.display_tree.tag_configure('B', background='yellow')
         self.display_tree.tag_configure('C', background='orange')
@@ -256,7 +281,8 @@ class StudentDashboardApp:
         # Add scrollbars
         scrollbar_y = ttk.Scrollbar(tab, orient="vertical", command=self.display_tree.yview)
         scrollbar_x = ttk.Scrollbar(tab, orient="horizontal", command=self.display_tree.xview)
-        self.display_tree.configure(yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
+        self.display_scrollbar = scrollbar_y
+        self.display_tree.configure(yscrollcommand=self.on_display_scroll, xscrollcommand=scrollbar_x.set)
 
         self.display_tree.pack(side="left", fill="both", expand=True, padx=10, pady=10)
         scrollbar_y.pack(side="right", fill="y")
@@ -282,6 +308,34 @@ class StudentDashboardApp:
         ttk.Button(search_frame, text="🔍 Search", command=self.search_student).pack(side="left", padx=5)
         ttk.Button(search_frame, text="🗑️ Clear", command=self.clear_search).pack(side="left", padx=5)
 
+        # Multi-criteria search
+        criteria_frame = tk.LabelFrame(tab, text="🔎 Find by Criteria", font=("Arial", 12, "bold"), bg='#f8f9fa', fg='#34495e')
+        criteria_frame.pack(pady=5, padx=20, fill="x")
+
+        ttk.Label(criteria_frame, text="Name:").grid(row=0, column=0, sticky="w", pady=5, padx=5)
+        self.search_name_entry = ttk.Entry(criteria_frame, font=("Arial", 10))
+        self.search_name_entry.grid(row=0, column=1, columnspan=3, sticky="ew", pady=5, padx=5)
+        self.search_prefix_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(criteria_frame, text="Starts with", variable=self.search_prefix_var).grid(row=0, column=4, sticky="w", padx=5)
+
+        ttk.Label(criteria_frame, text="Grade:").grid(row=1, column=0, sticky="w", pady=5, padx=5)
+        self.search_grade_var = tk.StringVar(value="All")
+        ttk.Combobox(criteria_frame, textvariable=self.search_grade_var, values=["All"] + GRADES, state="readonly", width=5).grid(row=1, column=1, sticky="w", padx=5)
+        ttk.Label(criteria_frame, text="Gender:").grid(row=1, column=2, sticky="w", pady=5, padx=5)
+        self.search_gender_var = tk.StringVar(value="All")
+        ttk.Combobox(criteria_frame, textvariable=self.search_gender_var, values=["All"] + list(GENDERS), state="readonly", width=5).grid(row=1, column=3, sticky="w", padx=5)
+
+        self.search_range_entries = {}
+        for i, (key, label) in enumerate([('min_age', "Age from:"), ('max_age', "Age to:"),
+                                          ('min_percentage', "Percentage from:"), ('max_percentage', "Percentage to:")]):
+            ttk.Label(criteria_frame, text=label).grid(row=2 + i // 2, column=(i % 2) * 2, sticky="w", pady=5, padx=5)
+            entry = ttk.Entry(criteria_frame, font=("Arial", 10), width=10)
+            entry.grid(row=2 + i // 2, column=(i % 2) * 2 + 1, sticky="w", padx=5)
+            self.search_range_entries[key] = entry
+
+        ttk.Button(criteria_frame, text="🔎 Find", command=self.search_by_criteria).grid(row=3, column=4, sticky="e", padx=5, pady=5)
+        criteria_frame.columnconfigure(1, weight=1)
+
         # Results frame
         results_frame = tk.Frame(tab, bg='#f8f9fa')
         results_frame.pack(pady=10, padx=20, fill="both", expand=True)
@@ -452,10 +506,10 @@ class StudentDashboardApp:
         gender_scrollbar.pack(side="right", fill="y")
 
         # Subject Averages Treeview
-        subject_frame = tk.LabelFrame(stats_container, text="📚 Subject Averages", font=("Arial", 12, "bold"), bg='#f8f9fa', fg='#34495e')
+        subject_frame = tk.LabelFrame(stats_container, text="📚 Subject Statistics", font=("Arial", 12, "bold"), bg='#f8f9fa', fg='#34495e')
         subject_frame.pack(fill="x", pady=5)
 
-        subject_columns = ('Subject', 'Average')
+        subject_columns = ('Subject', 'Mean', 'Std Dev', 'Median', 'Minimum', 'Maximum')
         self.subject_tree = ttk.Treeview(subject_frame, columns=subject_columns, show='headings', height=6)
         for col in subject_columns:
             self.subject_tree.heading(col, text=col)
@@ -468,8 +522,89 @@ class StudentDashboardApp:
         self.subject_tree.pack(side="left", fill="both", expand=True, padx=10, pady=5)
         subject_scrollbar.pack(side="right", fill="y")
 
+        self.correlation_label = tk.Label(stats_container, text="", font=("Arial", 10), bg='#f8f9fa', fg='#2c3e50', justify="left")
+        self.correlation_label.pack(fill="x", pady=5)
+
     def create_status_bar(self):
-        self.status_bar = tk.Label(self.root, text=f"Total Students: {len(self.students)}", bd=1, relief=tk.SUNKEN, anchor=tk.W)
+        self.status_frame = tk.Frame(self.root, bd=1, relief=tk.SUNKEN)
+        self.status_bar = tk.Label(self.status_frame, text=f"Total Students: {self.manager.count_students()}", anchor=tk.W)
+        self.status_bar.pack(side=tk.LEFT, fill="x", expand=True)
+        # Shown only while a background task runs
+        self.task_cancel_button = ttk.Button(self.status_frame, text="Cancel", command=self.cancel_tasks)
+        self.task_progress = ttk.Progressbar(self.status_frame, length=200)
+        self.task_label = tk.Label(self.status_frame, text="", anchor=tk.E)
+
+    def run_task(self, label, work, on_success, total=None, cancellable=False, on_cancel=None):
+        """Run ``work(report)`` on the worker thread and call ``on_success(result)`` back on the Tk thread."""
+        task = self.task_runner.submit(BackgroundTask(label, work, total=total, cancellable=cancellable))
+        self.active_tasks.append((task, on_success, on_cancel))
+        if len(self.active_tasks) == 1:
+            self.root.after(TASK_POLL_INTERVAL, self.poll_tasks)
+        self.show_task_progress()
+        return task
+
+    def busy(self):
+        # Imports and exports run one at a time; quick refreshes may queue behind them
+        if any(task.cancellable for task, _, _ in self.active_tasks):
+            messagebox.showinfo("Busy", "Please wait for the current import or export to finish.")
+            return True
+        return False
+
+    def poll_tasks(self):
+        pending = []
+        for task, on_success, on_cancel in self.active_tasks:
+            if not task.done:
+                pending.append((task, on_success, on_cancel))
+            elif task.cancelled:
+                if on_cancel:
+                    on_cancel()
+                self.status_bar.config(text=f"{task.label} cancelled.")
+            elif task.error is not None:
+                messagebox.showerror("Error", f"{task.label} failed: {task.error}")
+            else:
+                on_success(task.result)
+        self.active_tasks = pending
+        self.show_task_progress()
+        if pending:
+            self.root.after(TASK_POLL_INTERVAL, self.poll_tasks)
+
+    def show_task_progress(self):
+        if not self.active_tasks:
+            self.task_label.pack_forget()
+            self.task_progress.stop()
+            self.task_progress.pack_forget()
+            self.task_cancel_button.pack_forget()
+            return
+        task = self.active_tasks[0][0]
+        if task.total:
+            self.task_progress.stop()
+            self.task_progress.config(mode='determinate', maximum=task.total, value=min(task.progress, task.total))
+            text = f"{task.label}: {min(task.progress, task.total):,} / {task.total:,}"
+        else:
+            if str(self.task_progress.cget('mode')) != 'indeterminate':
+                self.task_progress.config(mode='indeterminate')
+                self.task_progress.start(20)
+            text = f"{task.label}: {task.progress:,} rows" if task.progress else f"{task.label}..."
+        self.task_label.config(text=text)
+        if not self.task_progress.winfo_ismapped():
+            self.task_label.pack(side=tk.LEFT, padx=5)
+            self.task_progress.pack(side=tk.LEFT, padx=5)
+        if task.cancellable:
+            self.task_cancel_button.pack(side=tk.LEFT, padx=5)
+        else:
+            self.task_cancel_button.pack_forget()
+
+    def cancel_tasks(self):
+        for task, _, _ in self.active_tasks:
+            if task.cancellable:
+                task.cancel()
+
+    def quit(self):
+        for task, _, _ in self.active_tasks:
+            task.cancel()
+        self.root.destroy()
+        self.task_runner.shutdown()
+        self.manager.close()
 
     def add_student(self):
         try:
@@ -513,7 +648,6 @@ class StudentDashboardApp:
                 'grade': grade
             }
             self.manager.add_student(student)
-            self.students = self.manager.get_all_students()
             self.status_label.config(text="Student added successfully!", foreground="green")
             messagebox.showinfo("Success", f"Student {name} added successfully!")
             self.clear_add_form()
@@ -527,32 +661,43 @@ class StudentDashboardApp:
             messagebox.showerror("Error", f"Unexpected error: {e}")
 
     def display_students(self):
-        self.students = self.manager.get_all_students()
-        # Clear the treeview
-        for item in self.display_tree.get_children():
-            self.display_tree.delete(item)
-
-        # Apply filters
+        """Show the first page; later pages are fetched as the user scrolls."""
+        # Apply filters in the database
         grade_filter = self.grade_filter_var.get()
         gender_filter = self.gender_filter_var.get()
-        filtered_students = [
-            s for s in self.students
-            if (grade_filter == "All" or s['grade'] == grade_filter) and
-               (gender_filter == "All" or s['gender'] == gender_filter)
-        ]
-
-        # Update summary
-        total_students = len(filtered_students)
-        avg_percentage = sum(s['percentage'] for s in filtered_students) / total_students if total_students > 0 else 0
-        self.summary_label.config(text=f"Showing {total_students} students | Average Percentage: {avg_percentage:.2f}%")
-
-        if not filtered_students:
+        grade = None if grade_filter == "All" else grade_filter
+        gender = None if gender_filter == "All" else gender_filter
+        column, descending = self.display_sort
+        query = {'grade': grade, 'gender': gender, 'sort_key': DISPLAY_SORT_KEYS[column], 'descending': descending}
+
+        def load(report):
+            summary = self.manager.summarize_students(grade=grade, gender=gender)
+            return summary, self.manager.get_students_page(page_size=GUI_PAGE_SIZE, **query)
+
+        self.run_task("Loading students", load, lambda result: self.render_display(query, *result))
+
+    def render_display(self, query, summary, page):
+        self.display_tree.delete(*self.display_tree.get_children())
+        self.display_pages.clear()
+        self.display_query = query
+        self.display_total = summary['count']
+        self.display_average = summary['average_percentage']
+        if not page['students']:
             # Insert a placeholder row
             self.display_tree.insert('', 'end', values=('No students to display.', '', '', '', '', '', ''))
+            self.update_display_summary()
             return
+        self.add_display_page(page, at_top=False)
+        self.display_tree.yview_moveto(0)
 
-        for student in filtered_students:
-            self.display_tree.insert('', 'end', values=(
+    def fetch_display_page(self, after=None, before=None):
+        return self.manager.get_students_page(page_size=GUI_PAGE_SIZE, after=after, before=before,
+                                              **self.display_query)
+
+    def add_display_page(self, page, at_top):
+        items = []
+        for index, student in enumerate(page['students']):
+            items.append(self.display_tree.insert('', index if at_top else 'end', values=(
                 student['name'],
                 student['roll_no'],
                 student['age'],
@@ -560,7 +705,54 @@ class StudentDashboardApp:
                 student['total'],
                 f"{student['percentage']:.2f}",
                 student['grade']
-            ), tags=(student['grade'],))
+            ), tags=(student['grade'],)))
+        if at_top:
+            self.display_pages.appendleft((page, items))
+        else:
+            self.display_pages.append((page, items))
+        self.update_display_summary()
+
+    def update_display_summary(self):
+        shown = sum(len(items) for _, items in self.display_pages)
+        self.summary_label.config(text=f"{self.display_total} students ({shown} loaded) | Average Percentage: {self.display_average:.2f}%")
+
+    def on_display_scroll(self, first, last):
+        self.display_scrollbar.set(first, last)
+        if self.display_loading or not self.display_pages:
+            return
+        if float(last) > 0.9 and self.display_pages[-1][0]['next_cursor']:
+            self.display_loading = True
+            self.root.after_idle(self.extend_display, False)
+        elif float(first) < 0.1 and self.display_pages[0][0]['prev_cursor']:
+            self.display_loading = True
+            self.root.after_idle(self.extend_display, True)
+
+    def extend_display(self, at_top):
+        """Fetch the page beyond one edge of the window and drop pages past GUI_WINDOW_PAGES at the other."""
+        try:
+            edge_page = self.display_pages[0][0] if at_top else self.display_pages[-1][0]
+            if at_top:
+                page = self.fetch_display_page(before=edge_page['prev_cursor'])
+            else:
+                page = self.fetch_display_page(after=edge_page['next_cursor'])
+            if not page['students']:
+                edge_page['prev_cursor' if at_top else 'next_cursor'] = None
+                return
+
+            # Remember which row is at the top of the view so it stays put as rows come and go
+            rows_before = len(self.display_tree.get_children())
+            top_row = int(float(self.display_tree.yview()[0]) * rows_before)
+            self.add_display_page(page, at_top)
+            shift = len(page['students']) if at_top else 0
+            while len(self.display_pages) > GUI_WINDOW_PAGES:
+                _, items = self.display_pages.pop() if at_top else self.display_pages.popleft()
+                self.display_tree.delete(*items)
+                if not at_top:
+                    shift -= len(items)
+            self.update_display_summary()
+            self.display_tree.yview_moveto((top_row + shift) / max(len(self.display_tree.get_children()), 1))
+        finally:
+            self.display_loading = False
 
     def search_student(self):
         self.search_result.delete(1.0, tk.END)
@@ -582,66 +774,88 @@ class StudentDashboardApp:
         except ValueError:
             messagebox.showerror("Error", "Invalid roll number.")
 
+    def search_by_criteria(self):
+        self.search_result.delete(1.0, tk.END)
+        try:
+            criteria = {
+                'name': self.search_name_entry.get().strip() or None,
+                'prefix': self.search_prefix_var.get(),
+                'grade': None if self.search_grade_var.get() == "All" else self.search_grade_var.get(),
+                'gender': None if self.search_gender_var.get() == "All" else self.search_gender_var.get()
+            }
+            for key, entry in self.search_range_entries.items():
+                value = entry.get().strip()
+                convert = int if key.endswith('age') else float
+                criteria[key] = convert(value) if value else None
+        except ValueError:
+            messagebox.showerror("Error", "Age and percentage bounds must be numbers.")
+            return
+        results = self.manager.search(**criteria)
+        if not results:
+            self.search_result.insert(tk.END, "No students match these criteria.\n")
+            return
+        self.search_result.insert(tk.END, f"{len(results)} students found:\n\n")
+        for student in results:
+            self.search_result.insert(tk.END, f"{student['roll_no']}: {student['name']} | Age {student['age']} | "
+                                              f"{student['gender']} | {student['percentage']:.2f}% | Grade {student['grade']}\n")
+
     def show_statistics(self):
-        self.students = self.manager.get_all_students()
-        if not self.students:
+        def load(report):
+            stats = self.manager.statistics_snapshot()
+            if not stats.total_students:
+                return stats, None
+            return stats, CohortAnalytics.from_manager(self.manager)
+
+        self.run_task("Computing statistics", load, lambda result: self.render_statistics(*result))
+
+    def render_statistics(self, stats, cohort):
+        # Clear treeviews
+        for tree in [self.grade_tree, self.gender_tree, self.subject_tree]:
+            for item in tree.get_children():
+                tree.delete(item)
+
+        total_students = stats.total_students
+        if not total_students:
             self.total_label.config(text="No data available.")
             self.avg_age_label.config(text="")
             self.highest_scorer_label.config(text="")
             self.class_avg_label.config(text="")
-            # Clear treeviews
-            for tree in [self.grade_tree, self.gender_tree, self.subject_tree]:
-                for item in tree.get_children():
-                    tree.delete(item)
+            self.correlation_label.config(text="")
             return
 
-        total_students = len(self.students)
-
         # Overall Statistics
         self.total_label.config(text=f"Total Students: {total_students}")
 
         # Average Age
-        avg_age = sum(s['age'] for s in self.students) / total_students
-        self.avg_age_label.config(text=f"Average Age: {avg_age:.1f} years")
+        self.avg_age_label.config(text=f"Average Age: {stats.average_age:.1f} years")
 
         # Highest Scorer
-        highest = self.manager.find_highest_scorer()
+        highest = stats.highest_scorer
         if highest:
             self.highest_scorer_label.config(text=f"🏆 Highest Scorer: {highest['name']} with {highest['total']} marks")
         else:
             self.highest_scorer_label.config(text="No students available.")
 
         # Class Average Percentage
-        avg_percentage = sum(s['percentage'] for s in self.students) / total_students
-        self.class_avg_label.config(text=f"📉 Class Average Percentage: {avg_percentage:.2f}%")
-
-        # Clear treeviews
-        for tree in [self.grade_tree, self.gender_tree, self.subject_tree]:
-            for item in tree.get_children():
-                tree.delete(item)
+        self.class_avg_label.config(text=f"📉 Class Average Percentage: {stats.average_percentage:.2f}%")
 
         # Grade Distribution
-        from collections import Counter
-        grades = [s['grade'] for s in self.students]
-        grade_counts = Counter(grades)
-        for grade in ['A', 'B', 'C', 'D', 'F']:
-            count = grade_counts.get(grade, 0)
-            percentage = (count / total_students) * 100 if total_students > 0 else 0
+        for grade, count, percentage in stats.grade_distribution():
             self.grade_tree.insert('', 'end', values=(grade, count, f"{percentage:.1f}%"))
 
         # Gender Distribution
-        genders = [s['gender'] for s in self.students]
-        gender_counts = Counter(genders)
-        gender_map = {'M': 'Male', 'F': 'Female', 'O': 'Other'}
-        for g, label in gender_map.items():
-            count = gender_counts.get(g, 0)
-            percentage = (count / total_students) * 100 if total_students > 0 else 0
+        for label, count, percentage in stats.gender_distribution():
             self.gender_tree.insert('', 'end', values=(label, count, f"{percentage:.1f}%"))
 
-        # Subject Averages
-        averages = self.manager.calculate_subject_averages()
-        for subject, avg in zip(SUBJECTS, averages):
-            self.subject_tree.insert('', 'end', values=(subject, f"{avg:.2f}"))
+        # Subject Statistics (vectorized over the whole cohort, computed on the worker thread)
+        for stat in cohort.subject_summary():
+            self.subject_tree.insert('', 'end', values=(
+                stat['subject'], f"{stat['mean']:.2f}", f"{stat['std']:.2f}", f"{stat['median']:.2f}",
+                f"{stat['minimum']:.2f}", f"{stat['maximum']:.2f}"
+            ))
+        pairs = correlation_pairs(cohort, top=3)
+        self.correlation_label.config(text="🔗 Strongest subject correlations: " + ", ".join(
+            f"{first}/{second} {value:+.2f}" for first, second, value in pairs) if pairs else "")
 
     def clear_add_form(self):
         self.name_entry.delete(0, tk.END)
@@ -662,52 +876,55 @@ class StudentDashboardApp:
     def export_json(self):
         file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
         if file_path:
-            import json
-            with open(file_path, 'w') as f:
-                json.dump(self.students, f, indent=4, default=str)
-            messagebox.showinfo("Success", "Data exported successfully!")
+            self.export_in_background("Exporting JSON", self.manager.save_data, file_path)
 
-    def import_json(self):
-        file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
+    def export_ndjson(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".ndjson", filetypes=[("NDJSON files", "*.ndjson")])
         if file_path:
-            try:
-                import json
-                with open(file_path, 'r') as f:
-                    imported_students = json.load(f)
-                # Clear existing and add imported
-                self.manager.delete_all_students()  # Careful: this deletes all
-                for student in imported_students:
-                    self.manager.add_student(student)
-                self.students = self.manager.get_all_students()
-                self.display_students()
-                self.update_status()
-                messagebox.showinfo("Success", "Data imported successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to import: {e}")
+            self.export_in_background("Exporting NDJSON", self.manager.export_ndjson, file_path)
 
     def export_csv(self):
         file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
         if file_path:
-            try:
-                self.manager.export_csv(file_path)
-                messagebox.showinfo("Success", "Data exported successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to export: {e}")
+            self.export_in_background("Exporting CSV", self.manager.export_csv, file_path)
+
+    def export_in_background(self, label, export, file_path):
+        if self.busy():
+            return
+
+        def remove_partial_file():
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+        self.run_task(label, lambda report: export(file_path, progress=report),
+                      lambda result: messagebox.showinfo("Success", "Data exported successfully!"),
+                      total=self.manager.count_students(), cancellable=True, on_cancel=remove_partial_file)
+
+    def import_json(self):
+        file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json *.ndjson")])
+        if file_path and not self.busy():
+            # Replaces every existing student in one transaction, so cancelling keeps the old data
+            self.run_task("Importing JSON", lambda report: self.manager.import_json(file_path, progress=report, replace_all=True),
+                          self.finish_import, cancellable=True, on_cancel=self.refresh_after_import)
 
     def import_csv(self):
         file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
-        if file_path:
-            try:
-                self.manager.import_csv(file_path)
-                self.students = self.manager.get_all_students()
-                self.display_students()
-                self.update_status()
-                messagebox.showinfo("Success", "Data imported successfully!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to import: {e}")
+        if file_path and not self.busy():
+            # Chunks are committed as they go; cancelling keeps the ones already written
+            self.run_task("Importing CSV", lambda report: self.manager.import_csv(file_path, progress=report),
+                          self.finish_import, cancellable=True, on_cancel=self.refresh_after_import)
+
+    def finish_import(self, count):
+        self.refresh_after_import()
+        messagebox.showinfo("Success", f"{count} students imported successfully!")
+
+    def refresh_after_import(self):
+        self.display_students()
+        self.show_statistics()
+        self.update_status()
 
     def update_status(self):
-        self.status_bar.config(text=f"Total Students: {len(self.students)}")
+        self.status_bar.config(text=f"Total Students: {self.manager.count_students()}")
 
     def load_student_for_edit(self):
         try:
@@ -810,25 +1027,26 @@ class StudentDashboardApp:
 
     def clear_search(self):
         self.search_entry.delete(0, tk.END)
+        self.search_name_entry.delete(0, tk.END)
+        for entry in self.search_range_entries.values():
+            entry.delete(0, tk.END)
         self.search_result.delete(1.0, tk.END)
 
-    def sort_treeview(self, col):
-        # Get all items
-        items = [(self.display_tree.set(item, col), item) for item in self.display_tree.get_children('')]
-
-        # Sort items
-        try:
-            items.sort(key=lambda t: float(t[0]) if t[0].replace('.', '').isdigit() else t[0])
-        except ValueError:
-            items.sort(key=lambda t: t[0])
-
-        # Rearrange items in sorted positions
-        for index, (val, item) in enumerate(items):
-            self.display_tree.move(item, '', index)
+    def sort_display(self, col):
+        # Clicking the sorted column again flips the direction; the database does the sorting
+        column, descending = self.display_sort
+        self.display_sort = (col, not descending if col == column else False)
+        for name in DISPLAY_SORT_KEYS:
+            arrow = (' ▼' if self.display_sort[1] else ' ▲') if name == col else ''
+            self.display_tree.heading(name, text=name + arrow)
+        self.display_students()
 
     def run(self):
         self.root.mainloop()
 
 if __name__ == "__main__":
+    # CSV imports may spawn parser processes; needed when the app is frozen into an executable
+    multiprocessing.freeze_support()
+    init_db()
     app = StudentDashboardApp()
     app.run()
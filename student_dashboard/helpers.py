@@ -1,7 +1,11 @@
+import bisect
 import json
 import math
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from numpy.typing import ArrayLike
+from jsonstream import iter_json_records
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -12,20 +16,16 @@ def calculate_percentage(total_marks: float, max_marks: float) -> float:
         raise ValueError("Max marks cannot be zero")
     return (total_marks / max_marks) * 100
 
+# Grade lookup table: a percentage of at least GRADE_BOUNDARIES[i] (and below the next
+# boundary) earns GRADE_BANDS[i + 1]; anything under the first boundary is GRADE_BANDS[0]
+GRADE_BOUNDARIES = (50, 60, 70, 80, 90)
+GRADE_BANDS = ('F', 'D', 'C', 'B', 'A', 'A+')
+
 # Function to assign grade based on percentage
 def assign_grade(percentage: float) -> str:
-    if percentage >= 90:
-        return 'A+'
-    elif percentage >= 80:
-        return 'A'
-    elif percentage >= 70:
-        return 'B'
-    elif percentage >= 60:
-        return 'C'
-    elif percentage >= 50:
-        return 'D'
-    else:
-        return 'F'
+    if math.isnan(percentage):
+        return GRADE_BANDS[0]
+    return GRADE_BANDS[bisect.bisect_right(GRADE_BOUNDARIES, percentage)]
 
 # Recursive function to calculate factorial (for roll number)
 def factorial(n: int) -> int:
@@ -43,6 +43,39 @@ def validate_name(name: str) -> str:
 def calculate_total(marks: List[float]) -> float:
     return sum(marks)
 
+# Batch versions of the grading functions. Each takes a whole batch as arrays and gives
+# exactly the scalar result for every row.
+
+def calculate_totals(marks: ArrayLike) -> np.ndarray:
+    """Row totals of a (students, subjects) marks matrix; NaN marks give a NaN total."""
+    marks = np.asarray(marks, dtype=np.float64)
+    totals = np.zeros(marks.shape[0])
+    # Column by column, so the additions happen in the same order as sum()
+    for column in marks.T:
+        totals += column
+    return totals
+
+def calculate_percentages(totals: ArrayLike, max_marks: float) -> np.ndarray:
+    if max_marks == 0:
+        raise ValueError("Max marks cannot be zero")
+    return (np.asarray(totals, dtype=np.float64) / max_marks) * 100
+
+def assign_grades(percentages: ArrayLike) -> np.ndarray:
+    """Grades for an array of percentages, looked up in the boundary table in one searchsorted() call."""
+    percentages = np.asarray(percentages, dtype=np.float64)
+    bands = np.searchsorted(GRADE_BOUNDARIES, percentages, side='right')
+    # searchsorted() places NaN above every boundary; the scalar version fails it
+    bands[np.isnan(percentages)] = 0
+    return _GRADE_BAND_ARRAY[bands]
+
+_GRADE_BAND_ARRAY = np.array(GRADE_BANDS)
+
+def grade_students(marks: ArrayLike, max_marks: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Totals, percentages and grades for a batch of mark rows."""
+    totals = calculate_totals(marks)
+    percentages = calculate_percentages(totals, max_marks)
+    return totals, percentages, assign_grades(percentages)
+
 # Function to find highest scorer
 def find_highest_scorer(students: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     if not students:
@@ -69,7 +102,6 @@ def save_data(students: List[Dict[str, Any]], filename: str = 'data.json') -> No
 # Function to load data from JSON (deprecated, use database)
 def load_data(filename: str = 'data.json') -> List[Dict[str, Any]]:
     try:
-        with open(filename, 'r') as f:
-            return json.load(f)
+        return list(iter_json_records(filename))
     except FileNotFoundError:
         return []
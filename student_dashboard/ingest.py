@@ -0,0 +1,73 @@
+import collections
+import csv
+import io
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Iterator, List, Tuple
+from config import INGEST_CHUNK_BYTES, INGEST_QUEUE_CHUNKS
+from models import csv_row_converter
+
+# Parallel CSV parsing for very large imports.
+# The file is cut into byte ranges that end on line boundaries, and each range is parsed and
+# validated in a worker process. Parsed chunks come back in file order through a bounded
+# window of pending results, so later rows still win on duplicate roll numbers, memory stays
+# at a few chunks per worker, and the one consuming thread stays the only database writer.
+# Fields with embedded newlines are not supported; student records never contain them.
+
+def split_byte_ranges(file_path: str, chunk_bytes: int = INGEST_CHUNK_BYTES) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Return the CSV header and (start, end) byte ranges covering every following line."""
+    size = os.path.getsize(file_path)
+    ranges = []
+    with open(file_path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode('utf-8')]), [])
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            # Finish the line the cut landed in, so no record is split between workers
+            f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+def parse_byte_range(file_path: str, start: int, end: int, header: List[str]) -> List[tuple]:
+    """Parse the records in one byte range into rows in STUDENT_COLUMNS order; runs in a worker."""
+    convert = csv_row_converter(header)
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8')
+    rows = []
+    for line_no, record in enumerate(csv.reader(io.StringIO(text, newline='')), 1):
+        if not record:
+            continue
+        try:
+            rows.append(convert(record))
+        except (ValueError, IndexError) as e:
+            raise ValueError(f"Invalid CSV record {line_no} of the chunk at byte {start}: {e}") from None
+    return rows
+
+def iter_csv_rows_parallel(file_path: str, workers: int, chunk_bytes: int = INGEST_CHUNK_BYTES,
+                           queue_chunks: int = INGEST_QUEUE_CHUNKS) -> Iterator[tuple]:
+    """Yield the rows of a CSV export in file order while ``workers`` processes parse ahead."""
+    header, ranges = split_byte_ranges(file_path, chunk_bytes)
+    csv_row_converter(header)  # reject a bad header before starting any process
+    ranges = iter(ranges)
+    # Spawned workers, because forking a process that runs GUI or web threads is unsafe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        pending: Deque[Future] = collections.deque()
+        try:
+            while True:
+                # Keep the queue full: at most queue_chunks parsed or in-flight chunks per worker
+                while len(pending) < workers * queue_chunks:
+                    byte_range = next(ranges, None)
+                    if byte_range is None:
+                        break
+                    pending.append(pool.submit(parse_byte_range, file_path, *byte_range, header))
+                if not pending:
+                    break
+                yield from pending.popleft().result()
+        finally:
+            # The consumer stopped early (an error or a cancelled import); drop queued work
+            for future in pending:
+                future.cancel()
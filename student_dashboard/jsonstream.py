@@ -0,0 +1,97 @@
+import json
+from typing import Any, Iterator, TextIO
+
+# Incremental readers for large JSON exports.
+# Both yield one decoded record at a time while holding only a small read buffer, so a
+# multi-gigabyte file is imported with memory bounded by the largest single record.
+
+READ_SIZE = 1 << 16  # characters read from the file at a time
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = _WHITESPACE + ',]'
+_LONGEST_TOKEN = 6  # a \uXXXX escape, the longest token that can be split across reads
+
+def iter_json_array(f: TextIO, read_size: int = READ_SIZE) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without loading the whole document."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    offset = 0  # characters dropped from the front of the buffer, for error positions
+
+    def fill(size: int) -> None:
+        nonlocal buffer, pos, eof, offset
+        chunk = f.read(size)
+        if not chunk:
+            eof = True
+        # Drop what has been consumed so the buffer never grows past one record
+        offset += pos
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if eof:
+                return ''
+            fill(read_size)
+
+    def error(message: str) -> ValueError:
+        return ValueError(f"{message} at character {offset + pos}")
+
+    if skip_whitespace() != '[':
+        raise error("Expected a JSON array")
+    pos += 1
+    if skip_whitespace() == ']':
+        return
+    while True:
+        skip_whitespace()
+        size = read_size
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # Only an error at the end of the buffer can be fixed by reading more
+                if eof or (e.pos < len(buffer) - _LONGEST_TOKEN and not e.msg.startswith('Unterminated')):
+                    raise ValueError(f"Invalid JSON at character {offset + e.pos}: {e.msg}") from e
+            else:
+                # A value is complete once a delimiter follows; "1.5" may be the start of "1.5e3"
+                if eof or (end < len(buffer) and buffer[end] in _DELIMITERS):
+                    break
+            # Grow the read geometrically so one large record costs O(n), not O(n^2)
+            fill(size)
+            size *= 2
+        pos = end
+        yield value
+        separator = skip_whitespace()
+        pos += 1
+        if separator == ']':
+            break
+        if separator != ',':
+            raise error("Expected ',' or ']'" if separator else "Unterminated JSON array")
+    if skip_whitespace():
+        raise error("Extra data after the JSON array")
+
+def iter_ndjson(f: TextIO) -> Iterator[Any]:
+    """Yield one value per non-blank line of newline-delimited JSON."""
+    for line_no, line in enumerate(f, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {line_no}: {e}") from e
+
+def iter_json_records(file_path: str) -> Iterator[Any]:
+    """Stream records from a JSON array or an NDJSON file, telling them apart by the first character."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        while first and first in _WHITESPACE:
+            first = f.read(1)
+        f.seek(0)
+        if first == '[':
+            yield from iter_json_array(f)
+        else:
+            yield from iter_ndjson(f)
@@ -0,0 +1,134 @@
+"""
+Student Performance Management System - Load Test
+Opens many concurrent keep-alive connections against a running dashboard and reports
+throughput and latency as JSON, to compare the sync (gunicorn) and ASGI serving modes:
+
+    gunicorn web_app:app -w 2 -b 127.0.0.1:8000 &
+    python load_test.py --url http://127.0.0.1:8000 --concurrency 200 --duration 20
+    uvicorn asgi:app --workers 2 --port 8001 &
+    python load_test.py --url http://127.0.0.1:8001 --concurrency 200 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ['/display', '/statistics', '/display?sort=total&order=desc']
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, path: str) -> Tuple[int, bool]:
+    """Send one GET and read the whole response; returns (status, keep_alive)."""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("server closed the connection")
+    status = int(status_line.split()[1])
+    length = None
+    chunked = False
+    keep_alive = True
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value.lower():
+            chunked = True
+        elif name == 'connection' and 'close' in value.lower():
+            keep_alive = False
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        keep_alive = False
+    return status, keep_alive
+
+async def _client(url: str, paths: List[str], deadline: float, latencies: List[float], errors: List[str],
+                  index: int) -> None:
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    connection = None
+    request_number = index
+    while time.perf_counter() < deadline:
+        path = paths[request_number % len(paths)]
+        request_number += 1
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection(host, port)
+            status, keep_alive = await _request(*connection, parts.netloc, path)
+            if not keep_alive:
+                connection[1].close()
+                connection = None
+            if status != 200:
+                errors.append(f"HTTP {status}")
+            else:
+                latencies.append(time.perf_counter() - start)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            errors.append(type(e).__name__)
+            if connection is not None:
+                connection[1].close()
+            connection = None
+    if connection is not None:
+        connection[1].close()
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))]
+
+async def run_load(url: str, concurrency: int, duration: float, paths: List[str]) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors: List[str] = []
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(_client(url, paths, deadline, latencies, errors, i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    error_counts: Dict[str, int] = {}
+    for error in errors:
+        error_counts[error] = error_counts.get(error, 0) + 1
+    return {
+        'url': url,
+        'paths': paths,
+        'concurrency': concurrency,
+        'duration_s': elapsed,
+        'requests': len(latencies),
+        'errors': error_counts,
+        'requests_per_s': len(latencies) / elapsed,
+        'latency_ms': {
+            'mean': statistics.mean(latencies) * 1000 if latencies else None,
+            'p50': (_percentile(latencies, 50) or 0) * 1000,
+            'p95': (_percentile(latencies, 95) or 0) * 1000,
+            'p99': (_percentile(latencies, 99) or 0) * 1000,
+            'max': latencies[-1] * 1000 if latencies else None
+        }
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test a running student dashboard")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds")
+    parser.add_argument('--path', dest='paths', action='append', help="path to request (repeatable)")
+    args = parser.parse_args(argv)
+    report = asyncio.run(run_load(args.url, args.concurrency, args.duration, args.paths or DEFAULT_PATHS))
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
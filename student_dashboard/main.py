@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -7,6 +8,7 @@ from helpers import (
     find_highest_scorer, calculate_subject_averages, factorial
 )
 from models import StudentManager
+from database import init_db
 from config import SUBJECTS, MAX_MARKS_PER_SUBJECT, TOTAL_MAX_MARKS
 
 # Initialize student manager
@@ -69,15 +71,16 @@ def search_student():
         print("Invalid roll number.")
 
 def show_statistics():
-    highest = manager.find_highest_scorer()
+    stats = manager.statistics_snapshot()
+    highest = stats.highest_scorer
     if highest:
         print(f"Highest Scorer: {highest['name']} with {highest['total']} marks")
     else:
         print("No data available.")
         return
-    averages = manager.calculate_subject_averages()
+    print(f"Total Students: {stats.total_students}, Class Average: {stats.average_percentage:.2f}%")
     print("Subject Averages:")
-    for subject, avg in zip(SUBJECTS, averages):
+    for subject, avg in stats.subject_average_pairs():
         print(f"{subject}: {avg:.2f}")
 
 def edit_student():
@@ -168,5 +171,8 @@ def main_menu():
             print("Invalid choice. Try again.")
 
 if __name__ == "__main__":
+    # CSV imports may spawn parser processes; needed when the app is frozen into an executable
+    multiprocessing.freeze_support()
+    init_db()
     print("Welcome to the Student Performance Management System!")
     main_menu()
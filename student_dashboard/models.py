@@ -1,179 +1,779 @@
 import sqlite3
 import json
 import csv
-from typing import List, Optional, Dict, Any
-from config import DATABASE_PATH, SUBJECTS
-import database  # Ensure database tables are created
+import base64
+import io
+import itertools
+import numpy as np
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import List, Optional, Dict, Any, Tuple, Iterator, Iterable, Callable, Mapping
+from config import (DATABASE_PATH, SUBJECTS, MARK_COLUMNS, GRADES, GENDERS, PAGE_SIZE, EXPORT_BATCH_SIZE, IMPORT_CHUNK_SIZE, BULK_CACHE_SIZE,
+                    SEARCH_LIMIT, TOTAL_MAX_MARKS, INGEST_WORKERS, READ_REPLICA)
+import database
+from database import STUDENT_COLUMNS, student_to_row
+from table import StudentTable
+from helpers import grade_students
+from snapshot import write_snapshot, open_snapshot
+from jsonstream import iter_json_records
+
+_SELECT_STUDENTS = f"SELECT {', '.join(STUDENT_COLUMNS)} FROM students"
+_INSERT_STUDENT = f"INSERT INTO students ({', '.join(STUDENT_COLUMNS)}) VALUES ({', '.join('?' * len(STUDENT_COLUMNS))})"
+_MARKS_START = STUDENT_COLUMNS.index(MARK_COLUMNS[0])
+_MARKS_END = _MARKS_START + len(MARK_COLUMNS)
+
+# Header of CSV exports and imports; same order as STUDENT_COLUMNS
+CSV_FIELDNAMES = ['roll_no', 'name', 'age', 'gender'] + SUBJECTS + ['total', 'percentage', 'grade']
+
+# Columns a listing may be ordered by; roll_no breaks ties so every cursor is unique
+SORT_KEYS = ('roll_no', 'name', 'age', 'gender', 'total', 'percentage', 'grade')
+
+def csv_row_converter(header: List[str]) -> Callable[[List[str]], tuple]:
+    """Return a function turning one CSV record with this header into a row in STUDENT_COLUMNS order."""
+    missing = [field for field in CSV_FIELDNAMES if field not in header]
+    if missing:
+        raise ValueError(f"CSV file is missing columns: {', '.join(missing)}")
+    roll_no, name, age, gender, *marks, total, percentage, grade = [header.index(field) for field in CSV_FIELDNAMES]
+
+    def convert(row: List[str]) -> tuple:
+        return (int(row[roll_no]), row[name], int(row[age]), row[gender],
+                *[float(row[i]) for i in marks],
+                float(row[total]), float(row[percentage]), row[grade])
+    return convert
+
+def iter_csv_rows(file_path: str) -> Iterator[tuple]:
+    with open(file_path, 'r', newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        convert = csv_row_converter(next(reader, []))
+        for row in reader:
+            # Blank lines (a hand-edited file, a trailing newline) carry no record
+            if not row:
+                continue
+            yield convert(row)
+
+def encode_cursor(value: Any, roll_no: int) -> str:
+    raw = json.dumps([value, roll_no], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, roll_no = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid page cursor") from e
+    # Sort values are NULL, text or numbers; anything else could not have come from encode_cursor()
+    if (not isinstance(roll_no, int) or isinstance(roll_no, bool) or isinstance(value, bool)
+            or not (value is None or isinstance(value, (str, int, float)))):
+        raise ValueError("Invalid page cursor")
+    return [value, roll_no]
+
+def check_page_query(page_size: int, sort_key: str, after: Optional[str] = None,
+                     before: Optional[str] = None) -> Optional[List[Any]]:
+    """Validate get_students_page() arguments without a query; returns the decoded cursor, if any."""
+    if sort_key not in SORT_KEYS:
+        raise ValueError(f"Cannot sort by {sort_key!r}")
+    if page_size < 1:
+        raise ValueError("Page size must be positive")
+    cursor = before if before is not None else after
+    return decode_cursor(cursor) if cursor else None
+
+def _keyset_condition(sort_key: str, op: str, after_null: bool) -> str:
+    # SQLite sorts NULL before every value, but a row comparison with NULL is never true,
+    # so the NULL rows (first ascending, last descending) need their own branch
+    if after_null:
+        if op == '>':
+            return f"(({sort_key} IS NULL AND roll_no > ?) OR {sort_key} IS NOT NULL)"
+        return f"{sort_key} IS NULL AND roll_no < ?"
+    if op == '>':
+        return f"({sort_key}, roll_no) > (?, ?)"
+    return f"(({sort_key}, roll_no) < (?, ?) OR {sort_key} IS NULL)"
+
+def _filter_clause(grade: Optional[str] = None, gender: Optional[str] = None) -> Tuple[List[str], List[Any]]:
+    conditions, params = [], []
+    if grade:
+        conditions.append("grade = ?")
+        params.append(grade)
+    if gender:
+        conditions.append("gender = ?")
+        params.append(gender)
+    return conditions, params
+
+@dataclass(frozen=True)
+class StatisticsSnapshot:
+    """Class statistics read in one statement, so every figure describes the same data version."""
+    total_students: int
+    average_age: float
+    average_total: float
+    average_percentage: float
+    subject_averages: Tuple[float, ...]
+    grade_counts: Mapping[str, int]
+    gender_counts: Mapping[str, int]
+    highest_scorer: Optional[Mapping[str, Any]]
+    data_version: int
+
+    def _distribution(self, counts: Mapping[str, int], keys: Iterable[str]) -> List[Tuple[str, int, float]]:
+        total = self.total_students
+        return [(key, counts.get(key, 0), counts.get(key, 0) / total * 100 if total else 0.0) for key in keys]
+
+    def grade_distribution(self) -> List[Tuple[str, int, float]]:
+        """(grade, count, percentage) for every grade in GRADES order."""
+        return self._distribution(self.grade_counts, GRADES)
+
+    def gender_distribution(self) -> List[Tuple[str, int, float]]:
+        """(label, count, percentage) for every gender in GENDERS order."""
+        return [(GENDERS[code], count, percentage)
+                for code, count, percentage in self._distribution(self.gender_counts, GENDERS)]
+
+    def subject_average_pairs(self) -> List[Tuple[str, float]]:
+        return list(zip(SUBJECTS, self.subject_averages))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'total_students': self.total_students,
+            'average_age': self.average_age,
+            'average_total': self.average_total,
+            'average_percentage': self.average_percentage,
+            'subject_averages': list(self.subject_averages),
+            'grade_counts': dict(self.grade_counts),
+            'gender_counts': dict(self.gender_counts),
+            'highest_scorer': dict(self.highest_scorer) if self.highest_scorer else None,
+            'data_version': self.data_version
+        }
+
+# Summary row, group counts, top scorer and data version in a single statement. The sums and
+# counts come from the trigger-maintained tables and the top scorer from idx_students_total,
+# so the cost does not depend on table size.
+_SNAPSHOT_QUERY = f'''
+    SELECT stats.student_count, {', '.join(f'stats.{column}_sum' for column in database.STAT_SUM_COLUMNS)},
+           (SELECT json_group_array(json_array(dimension, value, count))
+              FROM student_group_counts WHERE count > 0),
+           (SELECT version FROM data_version WHERE id = 1),
+           top.*
+    FROM (SELECT 1) AS one
+    LEFT JOIN student_stats AS stats ON stats.id = 1
+    LEFT JOIN ({_SELECT_STUDENTS} ORDER BY total DESC LIMIT 1) AS top
+'''
+
+@dataclass
+class BatchResult:
+    """Outcome of a batch write: how many items were applied and why the others were not."""
+    applied: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)  # {'index', 'roll_no', 'error'} per failed item
+    committed: bool = True
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'applied': self.applied, 'failed': len(self.errors), 'committed': self.committed,
+                'errors': self.errors}
+
+@dataclass
+class SyncSummary:
+    """What a sync import did to each student in, or missing from, the feed."""
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {'inserted': self.inserted, 'updated': self.updated, 'unchanged': self.unchanged,
+                'deleted': self.deleted}
+
+# Per-item failures a batch reports and skips; anything else (a locked database,
+# a full disk) aborts the whole batch
+_ITEM_ERRORS = (sqlite3.IntegrityError, sqlite3.InterfaceError, ValueError, TypeError, KeyError)
+
+# Fields update_student() and update_many() accept; marks expand to one column per subject
+UPDATABLE_FIELDS = ('name', 'age', 'gender', 'marks', 'total', 'percentage', 'grade')
+
+def _update_statement(roll_no: int, updated_fields: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    set_clause = []
+    values = []
+    for key, value in updated_fields.items():
+        if key not in UPDATABLE_FIELDS:
+            raise ValueError(f"Cannot update field {key!r}")
+        if key == 'marks':
+            # Marks live in one column per subject
+            value = list(value)
+            if len(value) != len(MARK_COLUMNS):
+                raise ValueError(f"Expected {len(MARK_COLUMNS)} marks, got {len(value)}")
+            set_clause.extend(f"{column} = ?" for column in MARK_COLUMNS)
+            values.extend(value)
+            continue
+        set_clause.append(f"{key} = ?")
+        values.append(value)
+    if not set_clause:
+        raise ValueError("No fields to update")
+    # The row no longer matches the feed it was synced from
+    set_clause.append("row_hash = NULL")
+    values.append(roll_no)
+    return f"UPDATE students SET {', '.join(set_clause)} WHERE roll_no = ?", values
 
 class StudentManager:
-    def __init__(self, db_path: str = DATABASE_PATH):
+    def __init__(self, db_path: str = DATABASE_PATH, read_replica: bool = READ_REPLICA):
         self.db_path = db_path
+        self._pool = database.get_pool(db_path)
+        self._closed = False
+        # Reads are served from an in-memory copy refreshed after writes (see database.ReadReplica)
+        self._replica = database.ReadReplica(db_path) if read_replica else None
+        self._name_index = None  # whether the FTS5 name index exists, checked on first search
 
-    def _connect(self):
-        return sqlite3.connect(self.db_path)
+    def _connect(self) -> sqlite3.Connection:
+        # Pooled per-thread connection; callers must not close it.
+        return self._pool.connection()
+
+    def _read_connection(self) -> sqlite3.Connection:
+        # The in-memory replica when enabled, otherwise the same connection writes use
+        if self._replica is None:
+            return self._connect()
+        return self._replica.connection(self._connect)
+
+    def _wrote(self) -> None:
+        # The next read in this process copies the database again, so it sees the write
+        if self._replica is not None:
+            self._replica.mark_stale()
+
+    def close(self) -> None:
+        # Other managers on the same database share the pool, so this only gives up a reference
+        if self._replica is not None:
+            self._replica.close()
+        if not self._closed:
+            self._closed = True
+            database.release_pool(self._pool)
 
     def add_student(self, student: Dict[str, Any]) -> None:
         conn = self._connect()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO students (roll_no, name, age, gender, marks, total, percentage, grade)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            student['roll_no'],
-            student['name'],
-            student['age'],
-            student['gender'],
-            json.dumps(student['marks']),
-            student['total'],
-            student['percentage'],
-            student['grade']
-        ))
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute(_INSERT_STUDENT, student_to_row(student))
+        self._wrote()
 
     def update_student(self, roll_no: int, updated_fields: Dict[str, Any]) -> bool:
         conn = self._connect()
-        cursor = conn.cursor()
-        set_clause = []
-        values = []
-        for key, value in updated_fields.items():
-            if key == 'marks':
-                value = json.dumps(value)
-            set_clause.append(f"{key} = ?")
-            values.append(value)
-        values.append(roll_no)
-        query = f"UPDATE students SET {', '.join(set_clause)} WHERE roll_no = ?"
-        cursor.execute(query, values)
-        conn.commit()
-        updated = cursor.rowcount > 0
-        conn.close()
-        return updated
+        query, values = _update_statement(roll_no, updated_fields)
+        with conn:
+            cursor = conn.execute(query, values)
+        self._wrote()
+        return cursor.rowcount > 0
 
     def delete_student(self, roll_no: int) -> bool:
         conn = self._connect()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM students WHERE roll_no = ?", (roll_no,))
-        conn.commit()
-        deleted = cursor.rowcount > 0
-        conn.close()
-        return deleted
+        with conn:
+            cursor = conn.execute("DELETE FROM students WHERE roll_no = ?", (roll_no,))
+        self._wrote()
+        return cursor.rowcount > 0
 
-    def get_student(self, roll_no: int) -> Optional[Dict[str, Any]]:
+    def _write_batch(self, items: Iterable[Any], apply: Callable[[sqlite3.Connection, Any], None],
+                     atomic: bool, prepare: Optional[Callable[[Any], Any]]) -> BatchResult:
+        """Apply ``apply`` to every item in one transaction, each inside its own savepoint.
+
+        A failing item is rolled back to its savepoint and reported; the rest
+        are committed together, so the batch costs one fsync. With ``atomic``
+        any failure rolls back the whole batch instead. ``prepare`` runs on
+        each item first, so validation errors are reported the same way.
+        """
+        result = BatchResult()
         conn = self._connect()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM students WHERE roll_no = ?", (roll_no,))
-        row = cursor.fetchone()
-        conn.close()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for index, item in enumerate(items):
+                conn.execute("SAVEPOINT batch_item")
+                try:
+                    apply(conn, prepare(item) if prepare else item)
+                except _ITEM_ERRORS as e:
+                    conn.execute("ROLLBACK TO batch_item")
+                    roll_no = item.get('roll_no') if isinstance(item, dict) else item
+                    result.errors.append({'index': index, 'roll_no': roll_no,
+                                          'error': f"Missing field {e}" if isinstance(e, KeyError) else str(e)})
+                else:
+                    result.applied += 1
+                conn.execute("RELEASE batch_item")
+            if atomic and result.errors:
+                conn.rollback()
+                result.applied = 0
+                result.committed = False
+        if result.applied:
+            self._wrote()
+        return result
+
+    def add_students(self, students: Iterable[Dict[str, Any]], atomic: bool = False,
+                     prepare: Optional[Callable[[Any], Dict[str, Any]]] = None) -> BatchResult:
+        """Insert many students in one transaction; duplicates and malformed rows are reported per item."""
+        return self._write_batch(students, lambda conn, student: conn.execute(_INSERT_STUDENT, student_to_row(student)),
+                                 atomic, prepare)
+
+    def update_many(self, updates: Iterable[Dict[str, Any]], atomic: bool = False,
+                    prepare: Optional[Callable[[Any], Dict[str, Any]]] = None) -> BatchResult:
+        """Apply many partial updates, each a dict of ``roll_no`` plus the fields to change."""
+        def apply(conn: sqlite3.Connection, update: Dict[str, Any]) -> None:
+            fields = dict(update)
+            roll_no = fields.pop('roll_no')
+            if conn.execute(*_update_statement(roll_no, fields)).rowcount == 0:
+                raise ValueError("Student not found")
+        return self._write_batch(updates, apply, atomic, prepare)
+
+    def delete_many(self, roll_nos: Iterable[int], atomic: bool = False,
+                    prepare: Optional[Callable[[Any], int]] = None) -> BatchResult:
+        def apply(conn: sqlite3.Connection, roll_no: int) -> None:
+            if conn.execute("DELETE FROM students WHERE roll_no = ?", (roll_no,)).rowcount == 0:
+                raise ValueError("Student not found")
+        return self._write_batch(roll_nos, apply, atomic, prepare)
+
+    def get_student(self, roll_no: int) -> Optional[Dict[str, Any]]:
+        conn = self._read_connection()
+        row = conn.execute(f"{_SELECT_STUDENTS} WHERE roll_no = ?", (roll_no,)).fetchone()
         if row:
             return self._row_to_dict(row)
         return None
 
-    def get_all_students(self) -> List[Dict[str, Any]]:
-        conn = self._connect()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM students")
-        rows = cursor.fetchall()
-        conn.close()
+    def get_all_students(self, grade: Optional[str] = None, gender: Optional[str] = None,
+                         batch_size: int = EXPORT_BATCH_SIZE) -> StudentTable:
+        """Return every matching student as a compact StudentTable in roll_no order.
+
+        The table reads like a list of student dicts, but holds typed columns
+        instead of one dict and marks list per row.
+        """
+        conditions, params = _filter_clause(grade, gender)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        capacity = 0 if conditions else self.count_students()
+        cursor = self._read_connection().execute(f"{_SELECT_STUDENTS}{where} ORDER BY roll_no", params)
+        return StudentTable.from_batches(iter(lambda: cursor.fetchmany(batch_size), []), capacity)
+
+    def get_students_page(self, page_size: int = PAGE_SIZE, sort_key: str = 'roll_no',
+                          descending: bool = False, after: Optional[str] = None,
+                          before: Optional[str] = None, grade: Optional[str] = None,
+                          gender: Optional[str] = None) -> Dict[str, Any]:
+        """Return one page of students using keyset pagination.
+
+        ``after`` and ``before`` are cursors taken from a previous page's
+        ``next_cursor`` and ``prev_cursor``. Each page costs an index seek
+        plus ``page_size`` rows, however deep into the table it is. Students
+        with no value for ``sort_key`` come first, or last when descending.
+        """
+        backwards = before is not None
+        cursor = check_page_query(page_size, sort_key, after, before)
+        conditions, params = _filter_clause(grade, gender)
+        # Walking backwards reads the rows just before the cursor in reverse order
+        scan_descending = descending != backwards
+        if cursor is not None:
+            op = '<' if scan_descending else '>'
+            if sort_key == 'roll_no':
+                conditions.append(f"roll_no {op} ?")
+                params.append(cursor[1])
+            else:
+                conditions.append(_keyset_condition(sort_key, op, cursor[0] is None))
+                params.extend(cursor if cursor[0] is not None else cursor[1:])
+        direction = 'DESC' if scan_descending else 'ASC'
+        order = f"roll_no {direction}" if sort_key == 'roll_no' else f"{sort_key} {direction}, roll_no {direction}"
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        query = f"{_SELECT_STUDENTS}{where} ORDER BY {order} LIMIT ?"
+        rows = self._read_connection().execute(query, params + [page_size + 1]).fetchall()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+        students = [self._row_to_dict(row) for row in rows]
+
+        def cursor_for(student: Dict[str, Any]) -> str:
+            return encode_cursor(student[sort_key], student['roll_no'])
+
+        if backwards:
+            prev_cursor = cursor_for(students[0]) if students and has_more else None
+            next_cursor = cursor_for(students[-1]) if students else None
+        else:
+            prev_cursor = cursor_for(students[0]) if students and cursor is not None else None
+            next_cursor = cursor_for(students[-1]) if students and has_more else None
+        return {
+            'students': students,
+            'sort_key': sort_key,
+            'descending': descending,
+            'page_size': page_size,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor
+        }
+
+    def search(self, name: Optional[str] = None, prefix: bool = False, grade: Optional[str] = None,
+               gender: Optional[str] = None, min_age: Optional[int] = None, max_age: Optional[int] = None,
+               min_percentage: Optional[float] = None, max_percentage: Optional[float] = None,
+               limit: int = SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        """Find students matching every given criterion, ordered by roll number.
+
+        ``name`` matches anywhere in the name, or only at its start when
+        ``prefix`` is set, ignoring case. Names of three or more characters
+        are looked up in the trigram index; shorter ones scan the names.
+        """
+        conditions, params = _filter_clause(grade, gender)
+        for column, op, value in (('age', '>=', min_age), ('age', '<=', max_age),
+                                  ('percentage', '>=', min_percentage), ('percentage', '<=', max_percentage)):
+            if value is not None:
+                conditions.append(f"{column} {op} ?")
+                params.append(value)
+        conn = self._read_connection()
+        name = (name or '').strip()
+        if name:
+            escaped = name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            if len(name) >= 3 and self._has_name_index(conn):
+                # Trigram phrase query narrows to names containing the text anywhere
+                conditions.append("roll_no IN (SELECT rowid FROM students_fts WHERE students_fts MATCH ?)")
+                params.append('"' + name.replace('"', '""') + '"')
+            if prefix:
+                conditions.append("name LIKE ? ESCAPE '\\'")
+                params.append(escaped + '%')
+            elif len(name) < 3 or not self._has_name_index(conn):
+                conditions.append("name LIKE ? ESCAPE '\\'")
+                params.append('%' + escaped + '%')
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = conn.execute(f"{_SELECT_STUDENTS}{where} ORDER BY roll_no LIMIT ?", params + [limit]).fetchall()
         return [self._row_to_dict(row) for row in rows]
 
+    def _has_name_index(self, conn: sqlite3.Connection) -> bool:
+        if self._name_index is None:
+            self._name_index = database.has_name_index(conn)
+        return self._name_index
+
+    def summarize_students(self, grade: Optional[str] = None, gender: Optional[str] = None) -> Dict[str, Any]:
+        conditions, params = _filter_clause(grade, gender)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        count, average = self._read_connection().execute(
+            f"SELECT COUNT(*), AVG(percentage) FROM students{where}", params
+        ).fetchone()
+        return {'count': count, 'average_percentage': average or 0.0}
+
     def _row_to_dict(self, row: tuple) -> Dict[str, Any]:
         return {
             'roll_no': row[0],
             'name': row[1],
             'age': row[2],
             'gender': row[3],
-            'marks': json.loads(row[4]),
-            'total': row[5],
-            'percentage': row[6],
-            'grade': row[7]
+            'marks': list(row[_MARKS_START:_MARKS_END]),
+            'total': row[_MARKS_END],
+            'percentage': row[_MARKS_END + 1],
+            'grade': row[_MARKS_END + 2]
         }
 
     def find_highest_scorer(self) -> Optional[Dict[str, Any]]:
-        conn = self._connect()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM students ORDER BY total DESC LIMIT 1")
-        row = cursor.fetchone()
-        conn.close()
+        conn = self._read_connection()
+        row = conn.execute(f"{_SELECT_STUDENTS} ORDER BY total DESC LIMIT 1").fetchone()
         if row:
             return self._row_to_dict(row)
         return None
 
     def calculate_subject_averages(self) -> List[float]:
+        return list(self.statistics_snapshot().subject_averages)
+
+    def statistics_snapshot(self) -> StatisticsSnapshot:
+        row = self._read_connection().execute(_SNAPSHOT_QUERY).fetchone()
+        count = row[0] or 0
+        sums = dict(zip(database.STAT_SUM_COLUMNS, row[1:1 + len(database.STAT_SUM_COLUMNS)]))
+        groups_json, version = row[1 + len(database.STAT_SUM_COLUMNS):3 + len(database.STAT_SUM_COLUMNS)]
+        top = row[3 + len(database.STAT_SUM_COLUMNS):]
+
+        def average(column: str) -> float:
+            return sums[column] / count if count else 0.0
+
+        groups: Dict[str, Dict[str, int]] = {dimension: {} for dimension in database.GROUP_DIMENSIONS}
+        for dimension, value, group_count in json.loads(groups_json or '[]'):
+            groups[dimension][value] = group_count
+        return StatisticsSnapshot(
+            total_students=count,
+            average_age=average('age'),
+            average_total=average('total'),
+            average_percentage=average('percentage'),
+            subject_averages=tuple(average(column) for column in MARK_COLUMNS),
+            grade_counts=MappingProxyType(groups['grade']),
+            gender_counts=MappingProxyType(groups['gender']),
+            highest_scorer=MappingProxyType(self._row_to_dict(top)) if top[0] is not None else None,
+            data_version=version or 0
+        )
+
+    def get_statistics(self) -> Dict[str, Any]:
+        stats = self.statistics_snapshot().as_dict()
+        del stats['highest_scorer'], stats['data_version']
+        return stats
+
+    def data_version(self) -> int:
+        # Bumped by triggers on every write; equal values mean the students table is unchanged
+        row = self._read_connection().execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+        return row[0] if row else 0
+
+    def count_students(self) -> int:
+        return database.student_count(self._read_connection())
+
+    def calculate_subject_statistics(self) -> List[Dict[str, Any]]:
+        conn = self._read_connection()
+        aggregates = ', '.join(f"AVG({column}), MIN({column}), MAX({column})" for column in MARK_COLUMNS)
+        row = conn.execute(f"SELECT {aggregates} FROM students").fetchone()
+        stats = []
+        for i, subject in enumerate(SUBJECTS):
+            average, minimum, maximum = row[i * 3:i * 3 + 3]
+            stats.append({
+                'subject': subject,
+                'average': average or 0.0,
+                'minimum': minimum or 0.0,
+                'maximum': maximum or 0.0
+            })
+        return stats
+
+    def _iter_rows(self, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[tuple]:
+        # Stream straight off the cursor; only one batch is ever held in memory
+        cursor = self._read_connection().execute(f"{_SELECT_STUDENTS} ORDER BY roll_no")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    def iter_mark_batches(self, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[tuple]]:
+        cursor = self._read_connection().execute(f"SELECT {', '.join(MARK_COLUMNS)} FROM students")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+
+    def iter_students(self, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        for row in self._iter_rows(batch_size):
+            yield self._row_to_dict(row)
+
+    def iter_csv_chunks(self, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_FIELDNAMES)
+        for count, row in enumerate(self._iter_rows(batch_size), 1):
+            writer.writerow(row)
+            if count % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def iter_ndjson_chunks(self, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+        lines = []
+        for student in self.iter_students(batch_size):
+            lines.append(json.dumps(student) + '\n')
+            if len(lines) >= batch_size:
+                yield ''.join(lines)
+                lines = []
+        if lines:
+            yield ''.join(lines)
+
+    def save_data(self, file_path: str = 'data.json', progress: Optional[Callable[[int], None]] = None) -> None:
+        # A JSON array with one compact record per line, written as rows arrive
+        with open(file_path, 'w') as f:
+            f.write('[')
+            separator = '\n'
+            for count, student in enumerate(self.iter_students(), 1):
+                f.write(separator)
+                f.write(json.dumps(student))
+                separator = ',\n'
+                if progress and count % EXPORT_BATCH_SIZE == 0:
+                    progress(count)
+            f.write('\n]\n')
+
+    def save_snapshot(self, file_path: str) -> int:
+        """Write every student to a binary snapshot (see snapshot.py); returns the row count."""
+        table = self.get_all_students()
+        write_snapshot(table, file_path)
+        return len(table)
+
+    def import_snapshot(self, file_path: str, progress: Optional[Callable[[int], None]] = None,
+                        replace_all: bool = False) -> int:
+        return self.bulk_import(open_snapshot(file_path).iter_rows(), progress=progress, replace_all=replace_all)
+
+    def import_students(self, students: Iterable[Dict[str, Any]],
+                        progress: Optional[Callable[[int], None]] = None) -> int:
+        return self.bulk_import((student_to_row(student) for student in students), progress=progress)
+
+    def bulk_import(self, rows: Iterable[tuple], chunk_size: int = IMPORT_CHUNK_SIZE,
+                    progress: Optional[Callable[[int], None]] = None, replace_all: bool = False) -> int:
+        """Insert or replace student rows (in STUDENT_COLUMNS order) in large batches.
+
+        Each chunk goes through a single executemany(). ``replace_all``
+        empties the table first. A replacing load, or one into an empty
+        table, drops the indexes and the statistics, search and version
+        triggers, rebuilds everything they maintain once at the end and runs
+        as one transaction, so an interrupted load never leaves the table
+        without them.
+
+        A load into a populated table commits each chunk on its own so the
+        WAL stays small, and does the trigger work once per chunk with
+        set-based statements (database.upsert_chunk). That costs time in
+        proportion to the rows loaded rather than to the whole table, but
+        the indexes are still updated row by row, so such a load is still
+        somewhat slower than one into an empty table. ``progress`` is called
+        with the running row count after each chunk.
+        """
         conn = self._connect()
-        cursor = conn.cursor()
-        cursor.execute("SELECT marks FROM students")
-        rows = cursor.fetchall()
-        conn.close()
-        if not rows:
-            return [0.0] * len(SUBJECTS)
-        totals = [0.0] * len(SUBJECTS)
-        for (marks_json,) in rows:
-            marks = json.loads(marks_json)
-            for i, mark in enumerate(marks):
-                totals[i] += mark
-        count = len(rows)
-        return [total / count for total in totals]
-
-    def save_data(self) -> None:
-        students = self.get_all_students()
-        with open('data.json', 'w') as f:
-            json.dump(students, f, indent=4)
-
-    def import_students(self, students: List[Dict[str, Any]]) -> None:
+        cache_size = conn.execute("PRAGMA cache_size").fetchone()[0]
+        # Durability is traded for speed only while the load runs
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(f"PRAGMA cache_size={BULK_CACHE_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        written = 0
+        rows = iter(rows)
+        try:
+            with conn:
+                # Explicit BEGIN so the emptiness check and the DDL below share the transaction
+                conn.execute("BEGIN IMMEDIATE")
+                rebuild = replace_all or conn.execute("SELECT 1 FROM students LIMIT 1").fetchone() is None
+                if rebuild:
+                    database.drop_derived_structures(conn)
+                if replace_all:
+                    conn.execute("DELETE FROM students")
+                while True:
+                    chunk = list(itertools.islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    if rebuild:
+                        conn.executemany(database.UPSERT_STUDENT, chunk)
+                    else:
+                        database.upsert_chunk(conn, chunk)
+                    written += len(chunk)
+                    if not rebuild:
+                        conn.commit()
+                        conn.execute("BEGIN IMMEDIATE")
+                    if progress:
+                        progress(written)
+                if rebuild:
+                    database.build_derived_structures(conn)
+        finally:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA cache_size={cache_size}")
+            conn.execute("PRAGMA temp_store=DEFAULT")
+            # Chunks may have been committed even if the import failed part way
+            self._wrote()
+        return written
+
+    def sync_import(self, rows: Iterable[tuple], delete_missing: bool = False, chunk_size: int = IMPORT_CHUNK_SIZE,
+                    progress: Optional[Callable[[int], None]] = None) -> SyncSummary:
+        """Bring the table in line with a full feed of rows (in STUDENT_COLUMNS order), writing only changes.
+
+        Each row's content hash is stored with it; a row whose hash matches
+        is skipped, so unchanged students cost no page writes, trigger work
+        or cache invalidation. With ``delete_missing`` students absent from
+        the feed are removed. The sync runs in one transaction, so a feed
+        that fails halfway changes nothing.
+        """
         conn = self._connect()
-        cursor = conn.cursor()
-        for student in students:
-            cursor.execute('''
-                INSERT OR REPLACE INTO students (roll_no, name, age, gender, marks, total, percentage, grade)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                student['roll_no'],
-                student['name'],
-                student['age'],
-                student['gender'],
-                json.dumps(student['marks']),
-                student['total'],
-                student['percentage'],
-                student['grade']
-            ))
-        conn.commit()
-        conn.close()
-
-    def export_csv(self, file_path: str) -> None:
-        students = self.get_all_students()
+        summary = SyncSummary()
+        seen = 0
+        rows = iter(rows)
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if delete_missing:
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS sync_seen (roll_no INTEGER PRIMARY KEY)")
+                conn.execute("DELETE FROM sync_seen")
+            count_before = database.student_count(conn)
+            written = 0
+            while True:
+                chunk = [(*row, database.row_hash(row)) for row in itertools.islice(rows, chunk_size)]
+                if not chunk:
+                    break
+                written += conn.executemany(database.SYNC_UPSERT_STUDENT, chunk).rowcount
+                if delete_missing:
+                    conn.executemany("INSERT OR IGNORE INTO sync_seen (roll_no) VALUES (?)",
+                                     [(row[0],) for row in chunk])
+                seen += len(chunk)
+                if progress:
+                    progress(seen)
+            # Inserts grow the trigger-maintained count; every other write was an update
+            summary.inserted = database.student_count(conn) - count_before
+            summary.updated = written - summary.inserted
+            summary.unchanged = seen - written
+            if delete_missing:
+                summary.deleted = conn.execute(
+                    "DELETE FROM students WHERE roll_no NOT IN (SELECT roll_no FROM sync_seen)").rowcount
+                conn.execute("DELETE FROM sync_seen")
+        if summary.inserted or summary.updated or summary.deleted:
+            self._wrote()
+        return summary
+
+    def sync_csv(self, file_path: str, delete_missing: bool = False,
+                 progress: Optional[Callable[[int], None]] = None) -> SyncSummary:
+        return self.sync_import(iter_csv_rows(file_path), delete_missing=delete_missing, progress=progress)
+
+    def sync_json(self, file_path: str, delete_missing: bool = False,
+                  progress: Optional[Callable[[int], None]] = None) -> SyncSummary:
+        return self.sync_import((student_to_row(student) for student in iter_json_records(file_path)),
+                                delete_missing=delete_missing, progress=progress)
+
+    def regrade(self, max_marks: float = TOTAL_MAX_MARKS, batch_size: int = IMPORT_CHUNK_SIZE,
+                progress: Optional[Callable[[int], None]] = None) -> int:
+        """Recompute total, percentage and grade from the marks, a batch at a time; returns how many changed.
+
+        Students with a missing mark are left as they are.
+        """
+        conn = self._connect()
+        query = (f"SELECT roll_no, {', '.join(MARK_COLUMNS)}, total, percentage, grade FROM students "
+                 f"WHERE roll_no > ? ORDER BY roll_no LIMIT ?")
+        changed = 0
+        seen = 0
+        last_roll_no = -2 ** 63
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            while True:
+                rows = conn.execute(query, (last_roll_no, batch_size)).fetchall()
+                if not rows:
+                    break
+                last_roll_no = rows[-1][0]
+                roll_nos, *columns = zip(*rows)
+                marks = np.array(columns[:len(MARK_COLUMNS)], dtype=np.float64).T
+                totals, percentages, grades = grade_students(marks, max_marks)
+                stored_totals = np.array(columns[-3], dtype=np.float64)
+                stored_percentages = np.array(columns[-2], dtype=np.float64)
+                differs = ((totals != stored_totals) | (percentages != stored_percentages)
+                           | (grades != np.array(columns[-1], dtype=object)))
+                differs &= ~np.isnan(totals)
+                updates = [(float(totals[i]), float(percentages[i]), str(grades[i]), roll_nos[i])
+                           for i in np.flatnonzero(differs)]
+                conn.executemany("UPDATE students SET total = ?, percentage = ?, grade = ?, row_hash = NULL "
+                                 "WHERE roll_no = ?", updates)
+                changed += len(updates)
+                seen += len(rows)
+                if progress:
+                    progress(seen)
+        if changed:
+            self._wrote()
+        return changed
+
+    def delete_all_students(self) -> int:
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM students")
+        self._wrote()
+        return cursor.rowcount
+
+    def export_csv(self, file_path: str, progress: Optional[Callable[[int], None]] = None) -> None:
+        """Write every student to a CSV file; ``progress`` gets the row count after each batch."""
         with open(file_path, 'w', newline='') as csvfile:
-            fieldnames = ['roll_no', 'name', 'age', 'gender'] + SUBJECTS + ['total', 'percentage', 'grade']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for student in students:
-                row = {
-                    'roll_no': student['roll_no'],
-                    'name': student['name'],
-                    'age': student['age'],
-                    'gender': student['gender'],
-                    'total': student['total'],
-                    'percentage': student['percentage'],
-                    'grade': student['grade']
-                }
-                for i, subject in enumerate(SUBJECTS):
-                    row[subject] = student['marks'][i]
-                writer.writerow(row)
-
-    def import_csv(self, file_path: str) -> None:
-        with open(file_path, 'r') as csvfile:
-            reader = csv.DictReader(csvfile)
-            students = []
-            for row in reader:
-                marks = [float(row[subject]) for subject in SUBJECTS]
-                student = {
-                    'roll_no': int(row['roll_no']),
-                    'name': row['name'],
-                    'age': int(row['age']),
-                    'gender': row['gender'],
-                    'marks': marks,
-                    'total': float(row['total']),
-                    'percentage': float(row['percentage']),
-                    'grade': row['grade']
-                }
-                students.append(student)
-            self.import_students(students)
+            for count, chunk in enumerate(self.iter_csv_chunks(), 1):
+                csvfile.write(chunk)
+                if progress:
+                    progress(count * EXPORT_BATCH_SIZE)
+
+    def export_ndjson(self, file_path: str, progress: Optional[Callable[[int], None]] = None) -> None:
+        with open(file_path, 'w') as f:
+            for count, chunk in enumerate(self.iter_ndjson_chunks(), 1):
+                f.write(chunk)
+                if progress:
+                    progress(count * EXPORT_BATCH_SIZE)
+
+    def import_csv(self, file_path: str, progress: Optional[Callable[[int], None]] = None,
+                   replace_all: bool = False, workers: int = INGEST_WORKERS) -> int:
+        """Import a CSV export, parsed in this process unless ``workers`` asks for a process pool.
+
+        Worker processes are spawned, so a program that passes ``workers``
+        above 1 needs an ``if __name__ == "__main__":`` guard (and
+        multiprocessing.freeze_support() when frozen).
+        """
+        if workers > 1:
+            from ingest import iter_csv_rows_parallel
+            rows = iter_csv_rows_parallel(file_path, workers)
+        else:
+            rows = iter_csv_rows(file_path)
+        return self.bulk_import(rows, progress=progress, replace_all=replace_all)
+
+    def import_json(self, file_path: str, progress: Optional[Callable[[int], None]] = None,
+                    replace_all: bool = False) -> int:
+        """Import a JSON array or NDJSON file, parsing one record at a time."""
+        return self.bulk_import((student_to_row(student) for student in iter_json_records(file_path)),
+                                progress=progress, replace_all=replace_all)
+
+    import_ndjson = import_json
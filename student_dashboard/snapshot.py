@@ -0,0 +1,207 @@
+import argparse
+import csv
+import itertools
+import json
+import mmap
+import os
+import struct
+from typing import Iterator, List, Optional
+import numpy as np
+from config import DATABASE_PATH, SUBJECTS, IMPORT_CHUNK_SIZE
+from database import student_to_row
+from jsonstream import iter_json_records
+from table import StudentTable
+
+# Binary columnar student snapshots.
+# A snapshot is a 256-byte header followed by one section per StudentTable column, each
+# aligned to 64 bytes and stored little-endian. Opening one maps the file and wraps every
+# section in a NumPy view, so nothing is parsed or copied until a value is read; a
+# 10M-student snapshot opens in about a millisecond and shares pages across processes.
+#
+# Header: magic, format version, subject count, reserved, row count, then an
+# (offset, nbytes) pair per section in _SECTIONS order. Marks are stored subject-major,
+# (subjects, students), so CohortAnalytics can use them without a transpose copy.
+
+MAGIC = b'STUSNAP\x00'
+FORMAT_VERSION = 3
+HEADER_SIZE = 256
+ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct('<8sHHIQ')
+_SECTIONS = (
+    ('labels', '<u1'),  # UTF-8 JSON: the subjects, and the genders and grades the codes refer to
+    ('roll_nos', '<i8'),
+    ('name_offsets', '<i8'),
+    ('names', '<u1'),  # string table; name i is names[name_offsets[i]:name_offsets[i + 1]]
+    ('ages', '<i8'),
+    ('age_known', '<u1'),  # 0 where the age is NULL
+    ('gender_codes', '<u1'),
+    ('grade_codes', '<u1'),
+    ('marks', '<f8'),
+    ('totals', '<f8'),
+    ('percentages', '<f8'),
+)
+_SECTION_TABLE = struct.Struct('<' + 'QQ' * len(_SECTIONS))
+
+FORMATS = ('snap', 'json', 'ndjson', 'csv')
+
+def write_snapshot(table: StudentTable, path: str) -> None:
+    """Write ``table`` (in roll_no order) to ``path``; the file is replaced atomically."""
+    labels = json.dumps({'subjects': list(SUBJECTS), 'genders': table.gender_labels,
+                         'grades': table.grade_labels}).encode('utf-8')
+    columns = {
+        'labels': np.frombuffer(labels, dtype=np.uint8),
+        'roll_nos': table.roll_nos,
+        'name_offsets': table.name_offsets,
+        'names': np.frombuffer(table.name_buffer, dtype=np.uint8),
+        'ages': table.ages,
+        'age_known': table.age_known,
+        'gender_codes': table.gender_codes,
+        'grade_codes': table.grade_codes,
+        'marks': table.marks.T,
+        'totals': table.totals,
+        'percentages': table.percentages,
+    }
+    temp_path = f"{path}.tmp"
+    sections = []
+    with open(temp_path, 'wb') as f:
+        f.write(bytes(HEADER_SIZE))
+        for name, dtype in _SECTIONS:
+            offset = f.tell()
+            padding = -offset % ALIGNMENT
+            f.write(bytes(padding))
+            data = np.ascontiguousarray(columns[name], dtype=dtype)
+            # An empty table has empty sections, which memoryview cannot cast
+            if data.nbytes:
+                f.write(memoryview(data).cast('B'))
+            sections.extend((offset + padding, data.nbytes))
+        f.seek(0)
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(SUBJECTS), 0, len(table)))
+        f.write(_SECTION_TABLE.pack(*sections))
+    os.replace(temp_path, path)
+
+def open_snapshot(path: str) -> StudentTable:
+    """Map a snapshot read-only and return a StudentTable whose columns are views of the file.
+
+    The mapping stays open for as long as the table (or any array taken
+    from it) is referenced.
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError(f"{path} is not a student snapshot") from None
+    if len(mapped) < HEADER_SIZE:
+        raise ValueError(f"{path} is not a student snapshot")
+    magic, version, subject_count, _, rows = _PREAMBLE.unpack_from(mapped, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a student snapshot")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version {version}")
+    layout = _SECTION_TABLE.unpack_from(mapped, _PREAMBLE.size)
+    views = {}
+    for (name, dtype), offset, nbytes in zip(_SECTIONS, layout[::2], layout[1::2]):
+        if offset + nbytes > len(mapped):
+            raise ValueError(f"Snapshot {path} is truncated")
+        views[name] = np.frombuffer(mapped, dtype=dtype, count=nbytes // np.dtype(dtype).itemsize, offset=offset)
+    labels = json.loads(views['labels'].tobytes())
+    if labels['subjects'] != list(SUBJECTS):
+        raise ValueError(f"Snapshot {path} was written for subjects {labels['subjects']}")
+    names = memoryview(views['names'])  # sliced and decoded per name by StudentTable.name()
+    return StudentTable(views['roll_nos'], names, views['name_offsets'], views['ages'],
+                        views['age_known'].view(np.bool_), views['gender_codes'],
+                        views['marks'].reshape(subject_count, rows).T, views['totals'], views['percentages'],
+                        views['grade_codes'], labels['genders'], labels['grades'])
+
+def read_rows(path: str, fmt: str) -> Iterator[tuple]:
+    """Yield rows in STUDENT_COLUMNS order from a JSON, NDJSON or CSV export."""
+    if fmt == 'csv':
+        from models import iter_csv_rows
+        yield from iter_csv_rows(path)
+    else:
+        for student in iter_json_records(path):
+            yield student_to_row(student)
+
+def load_table(path: str, fmt: Optional[str] = None) -> StudentTable:
+    """Read any supported format into a StudentTable in roll_no order."""
+    fmt = fmt or detect_format(path)
+    if fmt == 'snap':
+        return open_snapshot(path)
+    rows = read_rows(path, fmt)
+    batches = iter(lambda: list(itertools.islice(rows, IMPORT_CHUNK_SIZE)), [])
+    return StudentTable.from_batches(batches).by_roll_no()
+
+def write_table(table: StudentTable, path: str, fmt: Optional[str] = None) -> None:
+    fmt = fmt or detect_format(path)
+    if fmt == 'snap':
+        write_snapshot(table, path)
+        return
+    from models import CSV_FIELDNAMES
+    with open(path, 'w', newline='' if fmt == 'csv' else None) as f:
+        if fmt == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDNAMES)
+            writer.writerows(table.iter_rows())
+        elif fmt == 'ndjson':
+            for record in table:
+                f.write(json.dumps(record.to_dict()) + '\n')
+        else:
+            # Same layout as StudentManager.save_data(): one compact record per line
+            f.write('[')
+            separator = '\n'
+            for record in table:
+                f.write(separator)
+                f.write(json.dumps(record.to_dict()))
+                separator = ',\n'
+            f.write('\n]\n')
+
+def detect_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot tell the format of {path}; use one of: {', '.join(FORMATS)}")
+    return extension
+
+def convert(source: str, target: str, source_format: Optional[str] = None,
+            target_format: Optional[str] = None) -> int:
+    table = load_table(source, source_format)
+    write_table(table, target, target_format)
+    return len(table)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Convert student data to and from binary snapshots")
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert_parser = commands.add_parser('convert', help="convert between snap, json, ndjson and csv files")
+    convert_parser.add_argument('source')
+    convert_parser.add_argument('target')
+    convert_parser.add_argument('--from', dest='source_format', choices=FORMATS, help="default: by extension")
+    convert_parser.add_argument('--to', dest='target_format', choices=FORMATS, help="default: by extension")
+    for name, help_text in (('save', "write the database to a snapshot"),
+                            ('load', "import a snapshot into the database")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('snapshot')
+        command.add_argument('--db', default=DATABASE_PATH, help="database file (default: %(default)s)")
+    commands.choices['load'].add_argument('--replace', action='store_true', help="replace all existing students")
+    commands.add_parser('info', help="describe a snapshot").add_argument('snapshot')
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        count = convert(args.source, args.target, args.source_format, args.target_format)
+        print(f"Wrote {count} students to {args.target}.")
+    elif args.command == 'info':
+        table = open_snapshot(args.snapshot)
+        print(f"{len(table)} students, {os.path.getsize(args.snapshot)} bytes, subjects: {', '.join(SUBJECTS)}")
+    else:
+        from models import StudentManager
+        manager = StudentManager(args.db)
+        try:
+            if args.command == 'save':
+                count = manager.save_snapshot(args.snapshot)
+                print(f"Wrote {count} students to {args.snapshot}.")
+            else:
+                count = manager.import_snapshot(args.snapshot, replace_all=args.replace)
+                print(f"Imported {count} students from {args.snapshot}.")
+        finally:
+            manager.close()
+
+if __name__ == "__main__":
+    main()
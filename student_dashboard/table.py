@@ -0,0 +1,242 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+import numpy as np
+from config import SUBJECTS, GRADES, GENDERS
+
+# Compact in-memory student rosters for bulk reads.
+# A StudentTable stores each field as one typed array: names share a single UTF-8 buffer,
+# gender and grade are one-byte codes into per-table label lists, and marks are a row-major
+# float64 matrix. A million students take about 100 MB instead of the 650 MB the equivalent
+# list of dicts needs.
+
+_FIELDS = ('roll_no', 'name', 'age', 'gender', 'marks', 'total', 'percentage', 'grade')
+# Code 0 stands for a missing value; code i is labels[i - 1] of the table
+_MAX_LABELS = 255
+
+class StudentRecord:
+    """One student; reads like the dicts the rest of the code uses (``record['name']``)."""
+    __slots__ = _FIELDS
+
+    def __init__(self, roll_no: int, name: str, age: Optional[int], gender: Optional[str],
+                 marks: List[Optional[float]], total: Optional[float], percentage: Optional[float], grade: Optional[str]):
+        self.roll_no = roll_no
+        self.name = name
+        self.age = age
+        self.gender = gender
+        self.marks = marks
+        self.total = total
+        self.percentage = percentage
+        self.grade = grade
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in _FIELDS else default
+
+    def __contains__(self, key: object) -> bool:
+        return key in _FIELDS
+
+    def keys(self) -> Sequence[str]:
+        return _FIELDS
+
+    def items(self) -> Iterator[tuple]:
+        return ((field, getattr(self, field)) for field in _FIELDS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in _FIELDS}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, StudentRecord):
+            other = other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"StudentRecord({self.to_dict()!r})"
+
+def _real(value: np.float64) -> Optional[float]:
+    # NaN stands for a NULL mark, total or percentage
+    return None if np.isnan(value) else float(value)
+
+class StudentTable:
+    """Array-backed list of students in roll_no order; indexing yields StudentRecords."""
+
+    def __init__(self, roll_nos: np.ndarray, name_buffer: bytes, name_offsets: np.ndarray, ages: np.ndarray,
+                 age_known: np.ndarray, gender_codes: np.ndarray, marks: np.ndarray, totals: np.ndarray, percentages: np.ndarray,
+                 grade_codes: np.ndarray, gender_labels: Sequence[str] = tuple(GENDERS),
+                 grade_labels: Sequence[str] = tuple(GRADES)):
+        self.roll_nos = roll_nos
+        self.name_buffer = name_buffer
+        self.name_offsets = name_offsets  # len(self) + 1 boundaries into name_buffer
+        self.ages = ages
+        self.age_known = age_known  # False where the age is NULL; ages holds 0 there
+        self.gender_codes = gender_codes
+        self.marks = marks  # (students, subjects) float64, NaN for a missing mark
+        self.totals = totals
+        self.percentages = percentages
+        self.grade_codes = grade_codes
+        self.gender_labels = list(gender_labels)
+        self.grade_labels = list(grade_labels)
+        self._genders = [None] + self.gender_labels
+        self._grades = [None] + self.grade_labels
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[Sequence[Sequence[Any]]], capacity: int = 0) -> 'StudentTable':
+        """Build from batches of rows in STUDENT_COLUMNS order; ``capacity`` presizes the arrays."""
+        builder = _TableBuilder(max(capacity, 16))
+        for batch in batches:
+            builder.extend(batch)
+        return builder.finish()
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[Any]]) -> 'StudentTable':
+        return cls.from_batches([rows], len(rows))
+
+    def __len__(self) -> int:
+        return len(self.roll_nos)
+
+    def name(self, index: int) -> str:
+        # str() decodes bytes and memoryviews (a memory-mapped snapshot) alike
+        return str(self.name_buffer[self.name_offsets[index]:self.name_offsets[index + 1]], 'utf-8')
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("student index out of range")
+        return StudentRecord(
+            int(self.roll_nos[index]), self.name(index),
+            int(self.ages[index]) if self.age_known[index] else None,
+            self._genders[self.gender_codes[index]], [_real(value) for value in self.marks[index]],
+            _real(self.totals[index]), _real(self.percentages[index]), self._grades[self.grade_codes[index]])
+
+    def __iter__(self) -> Iterator[StudentRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, tuple, StudentTable)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def find(self, roll_no: int) -> Optional[StudentRecord]:
+        index = int(np.searchsorted(self.roll_nos, roll_no))
+        if index < len(self) and self.roll_nos[index] == roll_no:
+            return self[index]
+        return None
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [record.to_dict() for record in self]
+
+    def iter_rows(self) -> Iterator[tuple]:
+        """Yield rows in STUDENT_COLUMNS order, ready for StudentManager.bulk_import()."""
+        for record in self:
+            yield (record.roll_no, record.name, record.age, record.gender, *record.marks,
+                   record.total, record.percentage, record.grade)
+
+    def take(self, indices: np.ndarray) -> 'StudentTable':
+        """Return a new table holding the rows at ``indices``, in that order."""
+        indices = np.asarray(indices, dtype=np.int64)
+        starts = self.name_offsets[indices]
+        lengths = self.name_offsets[indices + 1] - starts
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # Byte positions of every gathered name, built without a Python loop
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1], dtype=np.int64)
+        names = np.frombuffer(self.name_buffer, dtype=np.uint8)[positions].tobytes()
+        return StudentTable(self.roll_nos[indices], names, offsets, self.ages[indices], self.age_known[indices],
+                            self.gender_codes[indices], self.marks[indices], self.totals[indices],
+                            self.percentages[indices], self.grade_codes[indices],
+                            self.gender_labels, self.grade_labels)
+
+    def by_roll_no(self) -> 'StudentTable':
+        """Sort by roll_no; of repeated roll numbers the last one wins, as with an upsert."""
+        if len(self) < 2 or bool(np.all(self.roll_nos[1:] > self.roll_nos[:-1])):
+            return self
+        order = np.argsort(self.roll_nos, kind='stable')
+        ordered = self.roll_nos[order]
+        keep = np.append(ordered[1:] != ordered[:-1], True)
+        return self.take(order[keep])
+
+    @property
+    def nbytes(self) -> int:
+        return (len(self.name_buffer) + sum(array.nbytes for array in (
+            self.roll_nos, self.name_offsets, self.ages, self.age_known, self.gender_codes, self.marks,
+            self.totals, self.percentages, self.grade_codes)))
+
+class _TableBuilder:
+    def __init__(self, capacity: int):
+        self.size = 0
+        self.names = bytearray()
+        self.columns = {
+            'roll_nos': np.empty(capacity, dtype=np.int64),
+            'name_offsets': np.zeros(capacity + 1, dtype=np.int64),
+            'ages': np.empty(capacity, dtype=np.int64),
+            'age_known': np.empty(capacity, dtype=np.bool_),
+            'gender_codes': np.empty(capacity, dtype=np.uint8),
+            'marks': np.empty((capacity, len(SUBJECTS)), dtype=np.float64),
+            'totals': np.empty(capacity, dtype=np.float64),
+            'percentages': np.empty(capacity, dtype=np.float64),
+            'grade_codes': np.empty(capacity, dtype=np.uint8),
+        }
+        # Values outside config are kept too; they get codes as they are first seen
+        self.gender_index = {gender: i for i, gender in enumerate(GENDERS, 1)}
+        self.grade_index = {grade: i for i, grade in enumerate(GRADES, 1)}
+
+    def _reserve(self, count: int) -> None:
+        capacity = len(self.columns['roll_nos'])
+        if self.size + count <= capacity:
+            return
+        capacity = max(capacity * 2, self.size + count)
+        for key, array in self.columns.items():
+            grown = np.zeros((capacity + (key == 'name_offsets'),) + array.shape[1:], dtype=array.dtype)
+            grown[:len(array)] = array
+            self.columns[key] = grown
+
+    def extend(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Append a batch of rows in STUDENT_COLUMNS order, one NumPy conversion per column."""
+        if not rows:
+            return
+        count = len(rows)
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        columns = list(zip(*rows))
+        c = self.columns
+        encoded = [name.encode('utf-8') for name in columns[1]]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=count)
+        c['name_offsets'][start + 1:end + 1] = len(self.names) + np.cumsum(lengths)
+        self.names += b''.join(encoded)
+        c['roll_nos'][start:end] = columns[0]
+        c['age_known'][start:end] = [age is not None for age in columns[2]]
+        c['ages'][start:end] = [0 if age is None else age for age in columns[2]]
+        c['gender_codes'][start:end] = [_code(self.gender_index, gender, 'gender') for gender in columns[3]]
+        # None (a missing value) becomes NaN
+        c['marks'][start:end] = np.array([row[4:4 + len(SUBJECTS)] for row in rows], dtype=np.float64)
+        c['totals'][start:end] = np.array(columns[-3], dtype=np.float64)
+        c['percentages'][start:end] = np.array(columns[-2], dtype=np.float64)
+        c['grade_codes'][start:end] = [_code(self.grade_index, grade, 'grade') for grade in columns[-1]]
+        self.size = end
+
+    def finish(self) -> StudentTable:
+        n = self.size
+        c = self.columns
+        # Copy the used prefix so the spare capacity is released
+        return StudentTable(c['roll_nos'][:n].copy(), bytes(self.names), c['name_offsets'][:n + 1].copy(),
+                            c['ages'][:n].copy(), c['age_known'][:n].copy(), c['gender_codes'][:n].copy(), c['marks'][:n].copy(),
+                            c['totals'][:n].copy(), c['percentages'][:n].copy(), c['grade_codes'][:n].copy(),
+                            list(self.gender_index), list(self.grade_index))
+
+def _code(index: Dict[str, int], value: Optional[str], field: str) -> int:
+    if value is None:
+        return 0
+    code = index.get(value)
+    if code is None:
+        if len(index) == _MAX_LABELS:
+            raise ValueError(f"More than {_MAX_LABELS} distinct {field} values")
+        code = index[value] = len(index) + 1
+    return code
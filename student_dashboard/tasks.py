@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+class TaskCancelled(Exception):
+    """Raised inside a task's progress callback once cancellation has been requested."""
+
+class BackgroundTask:
+    """A unit of work for TaskRunner. ``work`` receives ``report`` as its progress callback,
+    which is also where a cancelled task stops."""
+
+    def __init__(self, label: str, work: Callable[[Callable[[int], None]], Any],
+                 total: Optional[int] = None, cancellable: bool = False):
+        self.label = label
+        self.work = work
+        self.total = total
+        self.cancellable = cancellable
+        self.progress = 0
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+        self.future: Optional[Future] = None
+        self._cancel = threading.Event()
+
+    def report(self, count: int) -> None:
+        if self._cancel.is_set():
+            raise TaskCancelled()
+        self.progress = count
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def _run(self) -> None:
+        if self._cancel.is_set():
+            self.cancelled = True
+            return
+        try:
+            self.result = self.work(self.report)
+        except TaskCancelled:
+            self.cancelled = True
+        except Exception as e:
+            self.error = e
+
+class TaskRunner:
+    """Runs tasks one at a time on a single worker thread, which therefore holds a single
+    pooled SQLite connection. Results are read by polling, never by callbacks, so the
+    caller's UI thread is the only one that touches widgets."""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gui-task')
+
+    def submit(self, task: BackgroundTask) -> BackgroundTask:
+        task.future = self._executor.submit(task._run)
+        return task
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
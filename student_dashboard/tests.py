@@ -1,9 +1,16 @@
 import unittest
 from helpers import calculate_percentage, assign_grade, validate_name, calculate_total, calculate_subject_averages
 from models import StudentManager
+from analytics import CohortAnalytics
+from config import SUBJECTS
+import numpy as np
+from database import init_db
+import database
 import os
 import tempfile
+import json
 import sqlite3
+import threading
 
 class TestHelpers(unittest.TestCase):
     def test_calculate_percentage(self):
@@ -19,6 +26,22 @@ class TestHelpers(unittest.TestCase):
         self.assertEqual(assign_grade(55), 'D')
         self.assertEqual(assign_grade(45), 'F')
 
+    def test_batch_grading_matches_scalar(self):
+        from helpers import calculate_totals, calculate_percentages, assign_grades, grade_students
+        marks = np.array([[90, 95, 88.5, 92, 91], [49.99, 50, 50, 50, 50], [10, 20, 30, 40, 50.1],
+                          [80, 80, 80, 80, 80], [0, 0, 0, 0, 0]])
+        totals, percentages, grades = grade_students(marks, 500)
+        for row, total, percentage, grade in zip(marks.tolist(), totals, percentages, grades):
+            self.assertEqual(total, calculate_total(row))
+            self.assertEqual(percentage, calculate_percentage(total, 500))
+            self.assertEqual(grade, assign_grade(percentage))
+        boundaries = [-1, 49.999, 50, 59.9, 60, 70, 79.99, 80, 90, 100, float('nan')]
+        self.assertEqual(assign_grades(boundaries).tolist(), [assign_grade(p) for p in boundaries])
+        self.assertEqual(assign_grade(float('nan')), 'F')
+        self.assertTrue(np.array_equal(calculate_percentages(calculate_totals(marks), 500), percentages))
+        with self.assertRaises(ValueError):
+            calculate_percentages(totals, 0)
+
     def test_validate_name(self):
         self.assertEqual(validate_name("John Doe"), "John Doe")
         with self.assertRaises(ValueError):
@@ -35,31 +58,219 @@ class TestHelpers(unittest.TestCase):
         averages = calculate_subject_averages(students)
         self.assertEqual(averages, [82.5, 92.5, 82.5, 77.5, 72.5])
 
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.marks = rng.integers(0, 101, size=(len(SUBJECTS), 500)).astype(np.float32)
+        self.cohort = CohortAnalytics(self.marks)
+
+    def test_matches_numpy_reference(self):
+        np.testing.assert_allclose(self.cohort.means(), self.marks.astype(np.float64).mean(axis=1))
+        np.testing.assert_allclose(self.cohort.stds(), self.marks.astype(np.float64).std(axis=1), rtol=1e-6)
+        np.testing.assert_allclose(self.cohort.medians(), np.median(self.marks, axis=1))
+        np.testing.assert_allclose(self.cohort.correlations(), np.corrcoef(self.marks.astype(np.float64)), atol=1e-6)
+        edges, counts = self.cohort.histograms(bins=10)
+        for i in range(len(SUBJECTS)):
+            expected, _ = np.histogram(self.marks[i], bins=edges)
+            np.testing.assert_array_equal(counts[i], expected)
+
+    def test_missing_marks_are_ignored(self):
+        marks = np.array([[50, 70, np.nan]] + [[10, 20, 30]] * (len(SUBJECTS) - 1), dtype=np.float32)
+        cohort = CohortAnalytics(marks)
+        self.assertEqual(cohort.means()[0], 60.0)
+        self.assertEqual(cohort.histograms()[1][0].sum(), 2)
+
+class TestBenchmarks(unittest.TestCase):
+    def test_generate_cohort_matches_data_shape(self):
+        from benchmarks import generate_cohort
+        students = list(generate_cohort(250, chunk_size=100))
+        self.assertEqual([s['roll_no'] for s in students], list(range(1, 251)))
+        for student in students[:20]:
+            self.assertEqual(len(student['marks']), len(SUBJECTS))
+            self.assertTrue(validate_name(student['name']))
+            self.assertEqual(student['total'], calculate_total(student['marks']))
+            self.assertEqual(student['grade'], assign_grade(student['percentage']))
+
+    def test_compare_flags_regressions(self):
+        from benchmarks import compare
+        before = {'results': [{'size': 10, 'group': 'manager', 'benchmark': 'a', 'median_s': 1.0},
+                              {'size': 10, 'group': 'manager', 'benchmark': 'b', 'median_s': 1.0}]}
+        after = {'results': [{'size': 10, 'group': 'manager', 'benchmark': 'a', 'median_s': 1.5},
+                             {'size': 10, 'group': 'manager', 'benchmark': 'b', 'median_s': 1.1}]}
+        rows = compare(before, after, threshold=1.2)
+        self.assertEqual([row['regression'] for row in rows], [True, False])
+
+class TestAsgi(unittest.TestCase):
+    def test_wsgi_app_runs_on_executor_and_streams(self):
+        import asyncio
+        from asgi import WSGIToASGI
+
+        def wsgi_app(environ, start_response):
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [environ['QUERY_STRING'].encode(), b'-', environ['wsgi.input'].read()]
+
+        adapter = WSGIToASGI(wsgi_app, max_workers=2)
+        sent = []
+        requests = [{'type': 'http.request', 'body': b'body', 'more_body': False}]
+
+        async def receive():
+            return requests.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'POST', 'path': '/x', 'query_string': b'a=1', 'headers': []}
+        asyncio.run(adapter(scope, receive, send))
+        adapter.executor.shutdown()
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertEqual(b''.join(m.get('body', b'') for m in sent[1:]), b'a=1-body')
+        self.assertFalse(sent[-1]['more_body'])
+
+class TestTasks(unittest.TestCase):
+    def test_progress_result_and_cancellation(self):
+        from tasks import BackgroundTask, TaskRunner
+        runner = TaskRunner()
+        started = threading.Event()
+        release = threading.Event()
+
+        def work(report):
+            report(1)
+            started.set()
+            release.wait(5)
+            report(2)
+            return 'finished'
+
+        task = runner.submit(BackgroundTask('first', work))
+        cancelled = runner.submit(BackgroundTask('second', work, cancellable=True))
+        started.wait(5)
+        self.assertEqual(task.progress, 1)
+        cancelled.cancel()
+        release.set()
+        runner.shutdown()
+        self.assertEqual((task.result, task.progress, task.cancelled), ('finished', 2, False))
+        self.assertTrue(cancelled.cancelled)
+        self.assertIsNone(cancelled.result)
+
+    def test_errors_are_captured(self):
+        from tasks import BackgroundTask, TaskRunner
+        runner = TaskRunner()
+        task = runner.submit(BackgroundTask('failing', lambda report: 1 / 0))
+        runner.shutdown()
+        self.assertIsInstance(task.error, ZeroDivisionError)
+
+class TestJsonStream(unittest.TestCase):
+    def test_array_is_parsed_across_reads(self):
+        import io
+        from jsonstream import iter_json_array
+        records = [{'roll_no': i, 'name': 'Zoë "Z" Brown', 'marks': [1.5e3, -2, None, True]} for i in range(50)] + [12.5e-3]
+        for text in (json.dumps(records), json.dumps(records, indent=4)):
+            for read_size in (1, 7, 4096):
+                self.assertEqual(list(iter_json_array(io.StringIO(text), read_size)), records)
+        self.assertEqual(list(iter_json_array(io.StringIO(' [ ] '))), [])
+        for bad in ('{}', '[1, 2', '[1 2]', '[1,]', '[1] 2'):
+            with self.assertRaises(ValueError):
+                list(iter_json_array(io.StringIO(bad), 2))
+
+class TestStudentTable(unittest.TestCase):
+    def test_records_read_like_dicts(self):
+        from table import StudentTable
+        rows = [(1, 'Ann Lee', 19, 'F', 80.0, 77.3, None, 75.0, 70.0, 302.3, 60.46, 'B'),
+                (4, 'Zoë Brown', None, 'X', 50.0, 50.0, 50.0, 50.0, 50.0, 250.0, 50.0, 'D')]
+        table = StudentTable.from_rows(rows)
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table[0], {'roll_no': 1, 'name': 'Ann Lee', 'age': 19, 'gender': 'F',
+                                    'marks': [80.0, 77.3, None, 75.0, 70.0], 'total': 302.3,
+                                    'percentage': 60.46, 'grade': 'B'})
+        record = table.find(4)
+        self.assertEqual((record['name'], record['age'], record.get('gender')), ('Zoë Brown', None, 'X'))
+        self.assertIsNone(table.find(2))
+        self.assertEqual([r['roll_no'] for r in table[-1:]], [4])
+        with self.assertRaises(AttributeError):
+            record.nickname = 'Z'
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for name in os.listdir(self.workdir):
+            os.unlink(os.path.join(self.workdir, name))
+        os.rmdir(self.workdir)
+
+    def test_snapshot_round_trip_is_memory_mapped(self):
+        import snapshot
+        from table import StudentTable
+        rows = [(4, 'Zoë Brown', None, 'F', 50.0, 50.0, 50.0, 50.0, 50.0, 250.0, 50.0, 'D'),
+                (1, 'Ann Lee', 19, 'F', 80.0, 77.3, None, 75.0, 70.0, 302.3, 60.46, 'B'),
+                (4, 'Zoe Brown', 20, 'F', 60.0, 60.0, 60.0, 60.0, 60.0, 300.0, 60.0, 'C')]
+        table = StudentTable.from_rows(rows).by_roll_no()
+        self.assertEqual([(r['roll_no'], r['name']) for r in table], [(1, 'Ann Lee'), (4, 'Zoe Brown')])
+        path = os.path.join(self.workdir, 'students.snap')
+        snapshot.write_snapshot(table, path)
+        loaded = snapshot.open_snapshot(path)
+        self.assertEqual(loaded, table)
+        self.assertFalse(loaded.roll_nos.flags.writeable)
+        # Values outside config and marks beyond single precision survive the round trip
+        odd = StudentTable.from_rows([(9, 'Kim Park', 21, 'N', 80.123456789, 0, 0, 0, 0, 80.123456789, 16.02, 'E')])
+        snapshot.write_snapshot(odd, path)
+        record = snapshot.open_snapshot(path)[0]
+        self.assertEqual((record['gender'], record['marks'][0], record['grade']), ('N', 80.123456789, 'E'))
+        cohort = CohortAnalytics.from_table(loaded)
+        self.assertTrue(np.shares_memory(cohort.marks, loaded.marks))
+        with open(os.path.join(self.workdir, 'bad.snap'), 'wb') as f:
+            f.write(b'not a snapshot' * 100)
+        with self.assertRaises(ValueError):
+            snapshot.open_snapshot(os.path.join(self.workdir, 'bad.snap'))
+
+    def test_empty_table_round_trip(self):
+        import snapshot
+        json_path = os.path.join(self.workdir, 'empty.json')
+        with open(json_path, 'w') as f:
+            f.write('[]')
+        snap_path = os.path.join(self.workdir, 'empty.snap')
+        self.assertEqual(snapshot.convert(json_path, snap_path), 0)
+        self.assertEqual(len(snapshot.open_snapshot(snap_path)), 0)
+
+    def test_null_totals_are_written_as_json_null(self):
+        import snapshot
+        from table import StudentTable
+        table = StudentTable.from_rows([(1, 'Ann Lee', 19, 'F', 80.0, 77.3, None, 75.0, 70.0, None, None, 'B')])
+        for name in ('data.json', 'data.ndjson'):
+            path = os.path.join(self.workdir, name)
+            snapshot.write_table(table, path)
+            with open(path) as f:
+                text = f.read()
+            record = json.loads(text)[0] if name == 'data.json' else json.loads(text)
+            self.assertEqual((record['total'], record['percentage'], record['marks'][2]), (None, None, None))
+            self.assertEqual(len(snapshot.load_table(path)), 1)
+
+    def test_convert_between_formats(self):
+        import snapshot
+        students = [{'roll_no': roll_no, 'name': f'Student {roll_no}', 'age': 20, 'gender': 'M',
+                     'marks': [70.0, 71.5, 72.0, 73.0, 74.0], 'total': 360.5, 'percentage': 72.1, 'grade': 'B'}
+                    for roll_no in (3, 1, 2)]
+        json_path = os.path.join(self.workdir, 'data.json')
+        with open(json_path, 'w') as f:
+            json.dump(students, f, indent=4)
+        snap_path = os.path.join(self.workdir, 'data.snap')
+        csv_path = os.path.join(self.workdir, 'data.csv')
+        self.assertEqual(snapshot.convert(json_path, snap_path), 3)
+        snapshot.convert(snap_path, csv_path)
+        self.assertEqual(snapshot.load_table(csv_path).to_dicts(), sorted(students, key=lambda s: s['roll_no']))
+
 class TestStudentManager(unittest.TestCase):
     def setUp(self):
         self.db_fd, self.db_path = tempfile.mkstemp()
         os.close(self.db_fd)  # Close the file descriptor
         self.manager = StudentManager(self.db_path)
         # Create the table in the temp db
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS students (
-                roll_no INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                age INTEGER,
-                gender TEXT,
-                marks TEXT,
-                total REAL,
-                percentage REAL,
-                grade TEXT
-            )
-        ''')
-        conn.commit()
-        conn.close()
+        init_db(self.db_path)
 
     def tearDown(self):
-        os.unlink(self.db_path)
+        self.manager.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.unlink(self.db_path + suffix)
 
     def test_add_and_get_student(self):
         student = {
@@ -114,5 +325,528 @@ class TestStudentManager(unittest.TestCase):
         retrieved = self.manager.get_student(1)
         self.assertIsNone(retrieved)
 
+    def test_connection_is_reused_per_thread(self):
+        conn = self.manager._connect()
+        self.assertIs(self.manager._connect(), conn)
+        self.assertIs(StudentManager(self.db_path)._connect(), conn)
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.manager._connect()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], conn)
+        # The exited thread's connection was closed and dropped from the pool
+        with self.assertRaises(sqlite3.ProgrammingError):
+            other[0].execute("SELECT 1")
+        threads = [threading.Thread(target=self.manager._connect) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        self.assertEqual(len(self.manager._pool._connections), 1)
+
+    def test_closing_one_manager_leaves_shared_connections_open(self):
+        other = StudentManager(self.db_path)
+        conn = self.manager._connect()
+        self.assertIs(other._connect(), conn)
+        other.close()
+        other.close()
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM students").fetchone()[0], 0)
+        self.manager.close()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+    def test_analytics_load_from_database(self):
+        self.manager.import_students([
+            {'roll_no': i, 'name': 'John Doe', 'age': 20, 'gender': 'M',
+             'marks': [i, i * 2, i * 3, i * 4, i * 5], 'total': i * 15.0, 'percentage': i * 3.0, 'grade': 'F'}
+            for i in range(1, 4)
+        ])
+        cohort = CohortAnalytics.from_manager(self.manager, batch_size=2)
+        self.assertEqual(cohort.count, 3)
+        np.testing.assert_allclose(cohort.means(), [2, 4, 6, 8, 10])
+
+    def test_subject_statistics(self):
+        self.manager.import_students([
+            {'roll_no': 1, 'name': 'John Doe', 'age': 20, 'gender': 'M',
+             'marks': [80, 90, 85, 75, 70], 'total': 400, 'percentage': 80.0, 'grade': 'A'},
+            {'roll_no': 2, 'name': 'Jane Doe', 'age': 21, 'gender': 'F',
+             'marks': [85, 95, 80, 80, 75], 'total': 415, 'percentage': 83.0, 'grade': 'A'}
+        ])
+        self.assertEqual(self.manager.calculate_subject_averages(), [82.5, 92.5, 82.5, 77.5, 72.5])
+        math = self.manager.calculate_subject_statistics()[0]
+        self.assertEqual((math['subject'], math['minimum'], math['maximum']), ('Math', 80, 85))
+
+    def test_table_matches_get_student_with_nulls(self):
+        conn = self.manager._connect()
+        with conn:
+            conn.execute("INSERT INTO students (roll_no, name, age, total, percentage) VALUES (1, 'Ann Lee', NULL, NULL, NULL)")
+            conn.execute("INSERT INTO students (roll_no, name, age, gender, grade) VALUES (2, 'Bo Chen', 40000, 'M', 'A')")
+            conn.execute("INSERT INTO students (roll_no, name, age) VALUES (3, 'Cy Diaz', -1)")
+        table = self.manager.get_all_students()
+        self.assertEqual(table.to_dicts(), [self.manager.get_student(roll_no) for roll_no in (1, 2, 3)])
+
+    def test_keyset_pagination(self):
+        self.manager.import_students([
+            {'roll_no': i, 'name': f'Student {chr(64 + i)}', 'age': 20, 'gender': 'M',
+             'marks': [50, 50, 50, 50, 50], 'total': float(i % 4), 'percentage': 0.0, 'grade': 'F'}
+            for i in range(1, 8)
+        ])
+        first = self.manager.get_students_page(page_size=3, sort_key='total', descending=True)
+        self.assertEqual([s['roll_no'] for s in first['students']], [7, 3, 6])
+        self.assertIsNone(first['prev_cursor'])
+        second = self.manager.get_students_page(page_size=3, sort_key='total', descending=True,
+                                                after=first['next_cursor'])
+        self.assertEqual([s['roll_no'] for s in second['students']], [2, 5, 1])
+        last = self.manager.get_students_page(page_size=3, sort_key='total', descending=True,
+                                              after=second['next_cursor'])
+        self.assertEqual([s['roll_no'] for s in last['students']], [4])
+        self.assertIsNone(last['next_cursor'])
+        back = self.manager.get_students_page(page_size=3, sort_key='total', descending=True,
+                                              before=last['prev_cursor'])
+        self.assertEqual(back['students'], second['students'])
+        with self.assertRaises(ValueError):
+            self.manager.get_students_page(sort_key='marks')
+        from models import encode_cursor
+        for value in ([1], {'a': 1}, True):
+            with self.assertRaises(ValueError):
+                self.manager.get_students_page(sort_key='total', after=encode_cursor(value, 1))
+
+    def test_keyset_pagination_through_null_sort_keys(self):
+        self.manager.import_students([
+            {'roll_no': i, 'name': f'Student {i}', 'age': None if i % 2 else 20 + i % 3, 'gender': 'M',
+             'marks': [50, 50, 50, 50, 50], 'total': 250.0, 'percentage': 50.0, 'grade': 'D'}
+            for i in range(1, 10)
+        ])
+        for descending in (False, True):
+            expected = [row[0] for row in self.manager._connect().execute(
+                "SELECT roll_no FROM students ORDER BY age {0}, roll_no {0}".format('DESC' if descending else 'ASC'))]
+            pages = [self.manager.get_students_page(page_size=2, sort_key='age', descending=descending)]
+            while pages[-1]['next_cursor']:
+                pages.append(self.manager.get_students_page(page_size=2, sort_key='age', descending=descending,
+                                                            after=pages[-1]['next_cursor']))
+            self.assertEqual([s['roll_no'] for page in pages for s in page['students']], expected)
+            for earlier, later in zip(pages, pages[1:]):
+                back = self.manager.get_students_page(page_size=2, sort_key='age', descending=descending,
+                                                      before=later['prev_cursor'])
+                self.assertEqual(back['students'], earlier['students'])
+
+    def test_export_round_trip(self):
+        students = [
+            {'roll_no': i, 'name': 'John Doe', 'age': 20, 'gender': 'M',
+             'marks': [80.0, 90.0, 85.0, 75.0, 70.0], 'total': 400.0, 'percentage': 80.0, 'grade': 'A'}
+            for i in range(1, 6)
+        ]
+        self.manager.import_students(students)
+        csv_path = self.db_path + '.csv'
+        json_path = self.db_path + '.json'
+        ndjson_path = self.db_path + '.ndjson'
+        try:
+            self.manager.export_csv(csv_path)
+            self.manager.save_data(json_path)
+            self.manager._connect().execute("DELETE FROM students")
+            self.manager._connect().commit()
+            self.manager.import_csv(csv_path)
+            self.assertEqual(self.manager.get_all_students(), students)
+            with open(json_path) as f:
+                self.assertEqual(json.load(f), students)
+            self.manager.export_ndjson(ndjson_path)
+            for path in (json_path, ndjson_path):
+                self.assertEqual(self.manager.import_json(path, replace_all=True), len(students))
+                self.assertEqual(self.manager.get_all_students(), students)
+        finally:
+            for path in (csv_path, json_path, ndjson_path):
+                if os.path.exists(path):
+                    os.unlink(path)
+
+    def test_batch_writes_report_failures_per_item(self):
+        students = [{'roll_no': i, 'name': f'Student {i}', 'age': 20, 'gender': 'M',
+                     'marks': [50, 50, 50, 50, 50], 'total': 250, 'percentage': 50.0, 'grade': 'D'} for i in (1, 2, 1)]
+        result = self.manager.add_students(students + [{'roll_no': 4}])
+        self.assertEqual(result.applied, 2)
+        self.assertEqual([(e['index'], e['roll_no']) for e in result.errors], [(2, 1), (3, 4)])
+        self.assertEqual(self.manager.count_students(), 2)
+
+        result = self.manager.update_many([{'roll_no': 1, 'age': 21}, {'roll_no': 9, 'age': 30},
+                                           {'roll_no': 2, 'nickname': 'x'}])
+        self.assertEqual((result.applied, [e['index'] for e in result.errors]), (1, [1, 2]))
+        self.assertEqual(self.manager.get_student(1)['age'], 21)
+
+        result = self.manager.delete_many([1, 2, 3], atomic=True)
+        self.assertEqual((result.applied, result.committed), (0, False))
+        self.assertEqual(self.manager.count_students(), 2)
+        self.assertEqual(self.manager.delete_many([1, 2]).applied, 2)
+        self.assertEqual(self.manager.count_students(), 0)
+
+    def test_sync_import_writes_only_changes(self):
+        rows = [(i, f'Student {i}', 20, 'M', 50, 50, 50, 50, 50, 250, 50.0, 'D') for i in range(1, 6)]
+        summary = self.manager.sync_import(rows)
+        self.assertEqual(summary.as_dict(), {'inserted': 5, 'updated': 0, 'unchanged': 0, 'deleted': 0})
+        version = self.manager.data_version()
+        # Same content arriving as floats is still unchanged
+        as_floats = [row[:4] + tuple(float(value) for value in row[4:-1]) + row[-1:] for row in rows]
+        summary = self.manager.sync_import(as_floats, chunk_size=2)
+        self.assertEqual((summary.unchanged, summary.updated, summary.inserted), (5, 0, 0))
+        self.assertEqual(self.manager.data_version(), version)
+
+        self.manager.update_student(2, {'age': 30})  # drifted from the feed, so the next sync restores it
+        feed = rows[:3] + [rows[3][:1] + ('Renamed',) + rows[3][2:], (9, 'New Student', 19, 'F', 60, 60, 60, 60, 60, 300, 60.0, 'C')]
+        summary = self.manager.sync_import(feed, delete_missing=True)
+        self.assertEqual(summary.as_dict(), {'inserted': 1, 'updated': 2, 'unchanged': 2, 'deleted': 1})
+        self.assertEqual([s['roll_no'] for s in self.manager.get_all_students()], [1, 2, 3, 4, 9])
+        self.assertEqual(self.manager.get_student(2)['age'], 20)
+        self.assertEqual(self.manager.count_students(), 5)
+
+    def test_regrade_recomputes_derived_fields(self):
+        self.manager.bulk_import([(1, 'Ann Lee', 19, 'F', 90, 90, 90, 90, 90, 100, 20.0, 'F'),
+                                  (2, 'Bo Chen', 20, 'M', 50, 50, 50, 50, 50, 250, 50.0, 'D'),
+                                  (3, 'Cy Diaz', 21, 'M', 70, None, 70, 70, 70, 0, 0.0, 'F')])
+        self.assertEqual(self.manager.regrade(batch_size=2), 1)
+        student = self.manager.get_student(1)
+        self.assertEqual((student['total'], student['percentage'], student['grade']), (450, 90.0, 'A+'))
+        self.assertEqual(self.manager.get_student(3)['grade'], 'F')
+        self.assertEqual(self.manager.regrade(), 0)
+
+    def test_read_replica_follows_writes(self):
+        replica_manager = StudentManager(self.db_path, read_replica=True)
+        try:
+            replica_manager.add_student({'roll_no': 1, 'name': 'Ann Lee', 'age': 19, 'gender': 'F',
+                                         'marks': [80, 90, 85, 75, 70], 'total': 400, 'percentage': 80.0, 'grade': 'A'})
+            self.assertEqual(replica_manager.get_student(1)['name'], 'Ann Lee')
+            self.assertEqual(replica_manager._read_connection().execute("PRAGMA database_list").fetchone()[2], '')
+            # A write from another connection shows up once the refresh interval has passed
+            self.manager.update_student(1, {'age': 30})
+            replica_manager._replica.refresh_interval = 3600
+            self.assertEqual(replica_manager.get_student(1)['age'], 19)
+            replica_manager._replica.refresh_interval = 0
+            self.assertEqual(replica_manager.get_student(1)['age'], 30)
+            self.assertEqual(replica_manager.data_version(), self.manager.data_version())
+
+            results = []
+            def read():
+                results.append(replica_manager.count_students())
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join()
+            self.assertEqual(results, [1])
+            with self.assertRaises(sqlite3.OperationalError):
+                replica_manager._read_connection().execute("DELETE FROM students")
+        finally:
+            replica_manager.close()
+
+    def test_bulk_import_chunks_and_replace(self):
+        self.manager.add_student({'roll_no': 999, 'name': 'Old Student', 'age': 30, 'gender': 'F',
+                                  'marks': [0, 0, 0, 0, 0], 'total': 0, 'percentage': 0.0, 'grade': 'F'})
+        rows = [(i, 'Bulk Student', 20, 'M', 50.0, 50.0, 50.0, 50.0, 50.0, 250.0, 50.0, 'D') for i in range(1, 26)]
+        seen = []
+        written = self.manager.bulk_import(rows, chunk_size=10, progress=seen.append, replace_all=True)
+        self.assertEqual(written, 25)
+        self.assertEqual(seen, [10, 20, 25])
+        self.assertIsNone(self.manager.get_student(999))
+        self.assertEqual(self.manager.count_students(), 25)
+        indexes = self.manager._connect().execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_students_%'").fetchone()[0]
+        self.assertEqual(indexes, len(database.INDEXED_COLUMNS))
+
+    def test_parallel_csv_ingest_matches_serial(self):
+        from models import iter_csv_rows
+        from ingest import iter_csv_rows_parallel, split_byte_ranges
+        self.manager.bulk_import([(i, f'Student {i}', 20, 'F', 60, 61, 62, 63, 64.5, 310.5, 62.1, 'C') for i in range(1, 301)])
+        csv_path = self.db_path + '.csv'
+        try:
+            self.manager.export_csv(csv_path)
+            header, ranges = split_byte_ranges(csv_path, chunk_bytes=500)
+            self.assertGreater(len(ranges), 5)
+            self.assertEqual(ranges[-1][1], os.path.getsize(csv_path))
+            self.assertEqual(list(iter_csv_rows_parallel(csv_path, 2, chunk_bytes=500)), list(iter_csv_rows(csv_path)))
+            self.assertEqual(self.manager.import_csv(csv_path, replace_all=True, workers=2), 300)
+            self.assertEqual(self.manager.count_students(), 300)
+        finally:
+            os.unlink(csv_path)
+
+    def test_import_csv_rejects_missing_columns(self):
+        csv_path = self.db_path + '.csv'
+        with open(csv_path, 'w') as f:
+            f.write('roll_no,name\n1,John Doe\n')
+        try:
+            with self.assertRaises(ValueError):
+                self.manager.import_csv(csv_path)
+        finally:
+            os.unlink(csv_path)
+        self.assertEqual(self.manager.count_students(), 0)
+
+    def test_import_csv_skips_blank_lines(self):
+        from models import CSV_FIELDNAMES
+        csv_path = self.db_path + '.csv'
+        with open(csv_path, 'w') as f:
+            f.write(','.join(CSV_FIELDNAMES) + '\n\n1,John Doe,20,M,80,90,85,75,70,400,80.0,A\n\n')
+        try:
+            self.assertEqual(self.manager.import_csv(csv_path), 1)
+        finally:
+            os.unlink(csv_path)
+        self.assertEqual(self.manager.get_student(1)['name'], 'John Doe')
+
+    def test_statistics_follow_every_write(self):
+        def student(roll_no, age, gender, mark, grade):
+            return {'roll_no': roll_no, 'name': 'John Doe', 'age': age, 'gender': gender,
+                    'marks': [mark] * 5, 'total': mark * 5, 'percentage': float(mark), 'grade': grade}
+
+        self.manager.bulk_import([database.student_to_row(student(1, 20, 'M', 80, 'A'))])
+        self.manager.add_student(student(2, 22, 'F', 60, 'C'))
+        self.manager.import_students([student(3, 24, 'F', 40, 'F'), student(2, 22, 'F', 70, 'B')])
+        self.manager.update_student(1, {'gender': 'F'})
+        self.manager.delete_student(3)
+
+        stats = self.manager.get_statistics()
+        self.assertEqual(stats['total_students'], 2)
+        self.assertEqual(stats['average_age'], 21.0)
+        self.assertEqual(stats['average_percentage'], 75.0)
+        self.assertEqual(stats['subject_averages'], [75.0] * 5)
+        self.assertEqual(stats['grade_counts'], {'A': 1, 'B': 1})
+        self.assertEqual(stats['gender_counts'], {'F': 2})
+
+        snapshot = self.manager.statistics_snapshot()
+        self.assertEqual(snapshot.highest_scorer['roll_no'], 1)
+        self.assertEqual(snapshot.grade_distribution()[1:3], [('A', 1, 50.0), ('B', 1, 50.0)])
+        self.assertEqual(snapshot.gender_distribution()[1], ('Female', 2, 100.0))
+        with self.assertRaises(AttributeError):
+            snapshot.total_students = 0
+        with self.assertRaises(TypeError):
+            snapshot.grade_counts['A'] = 5
+
+    def test_bulk_import_into_populated_table_keeps_derived_data(self):
+        def row(roll_no, name, mark, grade):
+            return (roll_no, name, 20 + roll_no % 3, 'MF'[roll_no % 2], *[mark] * 5, mark * 5, float(mark), grade)
+
+        self.manager.bulk_import([row(i, f'Old Name {i}', 40, 'F') for i in range(1, 21)])
+        version = self.manager.data_version()
+        changes = [row(i, f'New Name {i}', 90, 'A+') for i in range(15, 31)] + [row(30, 'Last Name', 70, 'B')]
+        self.assertEqual(self.manager.bulk_import(changes, chunk_size=7), 17)
+        self.assertGreater(self.manager.data_version(), version)
+        conn = self.manager._connect()
+        stats = conn.execute("SELECT * FROM student_stats").fetchall()
+        groups = conn.execute("SELECT * FROM student_group_counts WHERE count > 0 ORDER BY 1, 2").fetchall()
+        with conn:
+            database.rebuild_statistics(conn)
+        self.assertEqual(conn.execute("SELECT * FROM student_stats").fetchall(), stats)
+        self.assertEqual(conn.execute("SELECT * FROM student_group_counts ORDER BY 1, 2").fetchall(), groups)
+        self.assertEqual(self.manager.count_students(), 30)
+        self.assertEqual([s['roll_no'] for s in self.manager.search(name='Old Name 1')],
+                         [1] + list(range(10, 15)))
+        self.assertEqual([s['roll_no'] for s in self.manager.search(name='Last')], [30])
+        self.assertEqual(database.missing_derived_structures(conn), [])
+        self.manager.update_student(30, {'name': 'Final Name'})
+        self.assertEqual([s['roll_no'] for s in self.manager.search(name='Final')], [30])
+
+    def test_statistics_snapshot_of_empty_table(self):
+        snapshot = self.manager.statistics_snapshot()
+        self.assertEqual(snapshot.total_students, 0)
+        self.assertIsNone(snapshot.highest_scorer)
+        self.assertEqual(snapshot.grade_distribution()[0], ('A+', 0, 0.0))
+
+    def test_search_combines_criteria(self):
+        names = ['John Smith', 'Johanna Doe', 'Ann Johnson', 'Jo Lee', 'Bob 100% Real']
+        self.manager.import_students([
+            {'roll_no': i, 'name': name, 'age': 18 + i, 'gender': 'MFFMM'[i - 1],
+             'marks': [60 + i * 5] * 5, 'total': (60 + i * 5) * 5.0, 'percentage': 60.0 + i * 5, 'grade': 'C'}
+            for i, name in enumerate(names, 1)
+        ])
+        self.manager.update_student(2, {'name': 'Joanna Doe'})
+
+        def roll_nos(**criteria):
+            return [s['roll_no'] for s in self.manager.search(**criteria)]
+
+        self.assertEqual(roll_nos(name='john'), [1, 3])
+        self.assertEqual(roll_nos(name='JOH', prefix=True), [1])
+        self.assertEqual(roll_nos(name='Jo', prefix=True), [1, 2, 4])
+        self.assertEqual(roll_nos(name='0%'), [5])
+        self.assertEqual(roll_nos(gender='F', min_percentage=72), [3])
+        self.assertEqual(roll_nos(min_age=20, max_age=22), [2, 3, 4])
+        self.manager.delete_student(1)
+        self.assertEqual(roll_nos(name='john'), [3])
+
+class TestWebApi(unittest.TestCase):
+    def setUp(self):
+        import web_app
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        os.close(self.db_fd)
+        init_db(self.db_path)
+        self.web_app = web_app
+        self.previous_manager = web_app.manager
+        self.manager = web_app.manager = StudentManager(self.db_path)
+        self.client = web_app.app.test_client()
+        self.manager.add_student({'roll_no': 1, 'name': 'Ann Lee', 'age': 19, 'gender': 'F',
+                                  'marks': [80, 90, 85, 75, 70], 'total': 400, 'percentage': 80.0, 'grade': 'A'})
+
+    def tearDown(self):
+        self.web_app.manager = self.previous_manager
+        self.manager.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.unlink(self.db_path + suffix)
+
+    def test_batch_endpoint(self):
+        response = self.client.post('/api/students/batch', json={
+            'add': [{'roll_no': 2, 'name': 'Bo Chen', 'age': 20, 'gender': 'm', 'marks': [90, 90, 90, 90, 90]},
+                    {'roll_no': 3, 'name': 'Cy', 'age': 20, 'gender': 'M', 'marks': [101, 0, 0, 0, 0]}],
+            'update': [{'roll_no': 1, 'marks': [50, 50, 50, 50, 50]}],
+            'delete': [42]})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual((body['add']['applied'], body['add']['errors'][0]['index']), (1, 1))
+        self.assertEqual(body['update']['applied'], 1)
+        self.assertEqual(body['delete']['errors'][0]['error'], 'Student not found')
+        self.assertEqual(self.manager.get_student(2)['grade'], 'A+')
+        self.assertEqual((self.manager.get_student(1)['total'], self.manager.get_student(1)['grade']), (250, 'D'))
+        self.assertEqual(self.client.post('/api/students/batch', json={'delete': [42]}).status_code, 422)
+        self.assertEqual(self.client.post('/api/students/batch', json=[1]).status_code, 400)
+        student = {'age': 20, 'gender': 'M', 'marks': [60, 60, 60, 60, 60]}
+        response = self.client.post('/api/students/batch', json={
+            'add': [dict(student, roll_no=5, name=None), dict(student, roll_no=3.7, name='Di Eze'),
+                    dict(student, roll_no=True, name='Di Eze')],
+            'delete': [True]})
+        self.assertEqual(response.status_code, 422)
+        body = response.get_json()
+        self.assertEqual([error['error'] for error in body['add']['errors']],
+                         ['name must be a string', 'roll_no must be an integer', 'roll_no must be an integer'])
+        self.assertEqual(body['delete']['errors'][0]['error'], 'roll_no must be an integer')
+        self.assertIsNotNone(self.manager.get_student(1))
+
+    def test_conditional_get_until_data_changes(self):
+        response = self.client.get('/api/students')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s['roll_no'] for s in response.get_json()['students']], [1])
+        etag = response.headers['ETag']
+
+        for url in ('/api/students', '/api/students/1', '/api/statistics'):
+            self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+        for url in ('/api/students?after=garbage', '/api/students?sort=bogus'):
+            self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 400)
+        # A current ETag does not hide that a student does not exist
+        self.assertEqual(self.client.get('/api/students/99', headers={'If-None-Match': etag}).status_code, 404)
+
+        self.manager.update_student(1, {'age': 20})
+        response = self.client.get('/api/students/1', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['age'], 20)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_display_sorts_in_the_database(self):
+        self.manager.add_student({'roll_no': 2, 'name': 'Bo Chen', 'age': 20, 'gender': 'M',
+                                  'marks': [-5, 50, 50, 50, 50], 'total': 195, 'percentage': 39.0, 'grade': 'F'})
+        page = self.client.get('/display?sort=total&order=asc').get_data(as_text=True)
+        self.assertLess(page.index('Bo Chen'), page.index('Ann Lee'))
+        self.assertIn('sort=total&amp;order=desc', page)
+        students = self.client.get('/api/students?sort=gender&order=desc').get_json()['students']
+        self.assertEqual([s['gender'] for s in students], ['M', 'F'])
+
+    def test_errors_are_json(self):
+        self.assertEqual(self.client.get('/api/students/99').get_json(), {'error': 'not found'})
+        self.assertEqual(self.client.get('/api/students?sort=bogus').status_code, 400)
+
+    def test_bulk_import_bumps_data_version(self):
+        version = self.manager.data_version()
+        self.manager.bulk_import([database.student_to_row({'roll_no': 2, 'name': 'Bo Chen', 'age': 20, 'gender': 'M',
+                                                           'marks': [50] * 5, 'total': 250, 'percentage': 50.0,
+                                                           'grade': 'D'})], replace_all=True)
+        self.assertGreater(self.manager.data_version(), version)
+
+    def test_pages_are_cached_until_a_write(self):
+        self.web_app.page_cache.clear()
+        hits = self.web_app.page_cache.hits
+        first = self.client.get('/display').get_data()
+        self.assertEqual(self.client.get('/display').get_data(), first)
+        self.assertEqual(self.web_app.page_cache.hits, hits + 1)
+
+        self.client.post('/delete/1')
+        page = self.client.get('/display').get_data(as_text=True)
+        self.assertIn('Student deleted successfully!', page)
+        self.assertNotIn('Ann Lee', self.client.get('/display').get_data(as_text=True))
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        from cache import LRUCache
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+class TestSchemaMigration(unittest.TestCase):
+    def setUp(self):
+        self.db_fd, self.db_path = tempfile.mkstemp()
+        os.close(self.db_fd)
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.unlink(self.db_path + suffix)
+
+    def test_json_marks_are_split_into_columns(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE students (
+                roll_no INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                age INTEGER,
+                gender TEXT,
+                marks TEXT,
+                total REAL,
+                percentage REAL,
+                grade TEXT
+            )
+        ''')
+        conn.execute("INSERT INTO students VALUES (7, 'Ann Lee', 19, 'F', '[80, 90, 85, 75, 70]', 400, 80.0, 'A')")
+        conn.commit()
+        conn.close()
+
+        init_db(self.db_path)
+
+        conn = sqlite3.connect(self.db_path)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(students)")]
+        row = conn.execute("SELECT math, art, total FROM students WHERE roll_no = 7").fetchone()
+        conn.close()
+        self.assertNotIn('marks', columns)
+        self.assertEqual(row, (80.0, 70.0, 400.0))
+
+    def test_migrations_are_recorded_and_run_once(self):
+        self.assertEqual(database.migrate(self.db_path), [version for version, _, _ in database.MIGRATIONS])
+        self.assertEqual(database.migrate(self.db_path), [])
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(database.schema_version(conn), database.SCHEMA_VERSION)
+        conn.close()
+
+    def test_migrate_repairs_an_interrupted_bulk_load(self):
+        database.migrate(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        # What a load killed after dropping the derived structures leaves behind
+        database.drop_derived_structures(conn)
+        conn.execute("INSERT INTO students (roll_no, name, age, total, percentage) VALUES (1, 'Ann Lee', 19, 400, 80.0)")
+        conn.commit()
+        self.assertTrue(database.missing_derived_structures(conn))
+        self.assertEqual(database.migrate(self.db_path), [])
+        self.assertEqual(database.missing_derived_structures(conn), [])
+        self.assertEqual(database.student_count(conn), 1)
+        conn.close()
+
+    def test_json_import_is_explicit(self):
+        json_path = self.db_path + '.json'
+        with open(json_path, 'w') as f:
+            json.dump([{'roll_no': 3, 'name': 'Ann Lee', 'age': 19, 'gender': 'F', 'marks': [80, 90, 85, 75, 70],
+                        'total': 400, 'percentage': 80.0, 'grade': 'A'}], f)
+        try:
+            init_db(self.db_path)
+            manager = StudentManager(self.db_path)
+            self.assertEqual(manager.count_students(), 0)
+            init_db(self.db_path, json_file=json_path)
+            self.assertEqual(manager.count_students(), 1)
+            manager.close()
+        finally:
+            os.unlink(json_path)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,4 +1,7 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import (Flask, render_template, request, redirect, url_for, flash, Response, stream_with_context, jsonify,
+                   abort, session, get_flashed_messages)
+import click
+import functools
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -7,15 +10,58 @@ from helpers import (
     calculate_percentage, assign_grade, calculate_total, validate_name,
     find_highest_scorer, calculate_subject_averages
 )
-from models import StudentManager
-from config import SUBJECTS, MAX_MARKS_PER_SUBJECT, TOTAL_MAX_MARKS
+from models import StudentManager, check_page_query
+from database import init_db
+from cache import LRUCache
+from analytics import CohortAnalytics
+from config import SUBJECTS, MAX_MARKS_PER_SUBJECT, TOTAL_MAX_MARKS, PAGE_SIZE, MAX_PAGE_SIZE, GRADES, GENDERS, PAGE_CACHE_SIZE
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key_here'  # Change this to a random secret key
+app.jinja_env.globals['zip'] = zip  # Templates pair subjects with marks
 
-# Initialize student manager
+# Initialize student manager; the schema is migrated by `flask init-db` or
+# `python database.py init` (the Procfile release phase), not on worker start
 manager = StudentManager()
 
+@app.cli.command('init-db')
+def init_db_command():
+    applied = init_db()
+    print(f"Applied migrations: {applied}" if applied else "Schema is up to date.")
+
+@app.cli.command('sync-import')
+@click.argument('file_path')
+@click.option('--delete-missing', is_flag=True, help="Delete students that are not in the file.")
+def sync_import_command(file_path, delete_missing):
+    """Sync students from a CSV, JSON or NDJSON feed, writing only new and changed rows."""
+    sync = manager.sync_csv if file_path.lower().endswith('.csv') else manager.sync_json
+    summary = sync(file_path, delete_missing=delete_missing)
+    print(', '.join(f"{count} {outcome}" for outcome, count in summary.as_dict().items()))
+
+# Rendered GET pages keyed by (data version, URL). Writes from any process bump the
+# version, so stale pages are never served; clear() on local writes just frees memory early.
+page_cache = LRUCache(PAGE_CACHE_SIZE)
+
+def cached_page(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        # Flash messages belong to a single response, so pages showing them are rendered fresh
+        if request.method != 'GET' or session.get('_flashes'):
+            return view(*args, **kwargs)
+        key = (manager.data_version(), request.full_path)
+        html = page_cache.get(key)
+        if html is None:
+            html = view(*args, **kwargs)
+            if isinstance(html, str) and not get_flashed_messages():
+                page_cache.put(key, html)
+        return html
+    return wrapper
+
+@app.cli.command('regrade')
+def regrade_command():
+    """Recompute every student's total, percentage and grade from their marks."""
+    print(f"Regraded {manager.regrade()} students.")
+
 @app.route('/')
 def home():
     return render_template('home.html')
@@ -50,6 +96,7 @@ def add_student():
                 'grade': grade
             }
             manager.add_student(student)
+            page_cache.clear()
             flash(f"Student {name} added successfully!", "success")
             return redirect(url_for('home'))
         except ValueError as e:
@@ -59,13 +106,35 @@ def add_student():
     return render_template('add_student.html', subjects=SUBJECTS)
 
 @app.route('/display')
+@cached_page
 def display_students():
-    students = manager.get_all_students()
-    return render_template('display_students.html', students=students)
+    sort_key = request.args.get('sort', 'roll_no')
+    descending = request.args.get('order') == 'desc'
+    try:
+        page_size = min(max(int(request.args.get('per_page', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        page = manager.get_students_page(page_size=page_size, sort_key=sort_key, descending=descending,
+                                         after=request.args.get('after'), before=request.args.get('before'))
+    except ValueError:
+        flash("Invalid page request.", "error")
+        page = manager.get_students_page()
+    return render_template('display_students.html', students=page['students'], page=page,
+                           total_students=manager.count_students())
+
+@app.route('/export.csv')
+def export_csv():
+    return Response(stream_with_context(manager.iter_csv_chunks()), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=students.csv'})
+
+@app.route('/export.ndjson')
+def export_ndjson():
+    return Response(stream_with_context(manager.iter_ndjson_chunks()), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': 'attachment; filename=students.ndjson'})
 
 @app.route('/search', methods=['GET', 'POST'])
+@cached_page
 def search_student():
     student = None
+    results = None
     if request.method == 'POST':
         try:
             roll_no = int(request.form['roll_no'])
@@ -74,13 +143,44 @@ def search_student():
                 flash("Student not found.", "error")
         except ValueError:
             flash("Invalid roll number.", "error")
-    return render_template('search_student.html', student=student, subjects=SUBJECTS)
+    elif request.args:
+        try:
+            criteria = _search_criteria(request.args)
+            results = manager.search(**criteria)
+        except ValueError:
+            flash("Invalid search criteria.", "error")
+    return render_template('search_student.html', student=student, results=results, subjects=SUBJECTS,
+                           grades=GRADES, genders=GENDERS, criteria=request.args)
+
+def _search_criteria(args):
+    def optional(key, convert):
+        value = args.get(key, '').strip()
+        return convert(value) if value else None
+
+    return {
+        'name': args.get('name', '').strip() or None,
+        'prefix': args.get('match') == 'prefix',
+        'grade': args.get('grade') or None,
+        'gender': args.get('gender') or None,
+        'min_age': optional('min_age', int),
+        'max_age': optional('max_age', int),
+        'min_percentage': optional('min_percentage', float),
+        'max_percentage': optional('max_percentage', float)
+    }
 
 @app.route('/statistics')
+@cached_page
 def show_statistics():
-    highest = manager.find_highest_scorer()
-    averages = manager.calculate_subject_averages()
-    return render_template('statistics.html', highest=highest, averages=averages, subjects=SUBJECTS)
+    return render_template('statistics.html', stats=manager.statistics_snapshot())
+
+@app.route('/analytics')
+@cached_page
+def show_analytics():
+    cohort = CohortAnalytics.from_manager(manager)
+    edges, histograms = cohort.histograms()
+    return render_template('analytics.html', count=cohort.count, summary=cohort.subject_summary(),
+                           correlations=cohort.correlations().tolist(), edges=edges.tolist(),
+                           histograms=histograms.tolist(), subjects=SUBJECTS)
 
 @app.route('/edit/<int:roll_no>', methods=['GET', 'POST'])
 def edit_student(roll_no):
@@ -114,6 +214,7 @@ def edit_student(roll_no):
                 'grade': grade
             }
             if manager.update_student(roll_no, updated_fields):
+                page_cache.clear()
                 flash(f"Student {name} updated successfully!", "success")
                 return redirect(url_for('home'))
             else:
@@ -127,11 +228,148 @@ def edit_student(roll_no):
 @app.route('/delete/<int:roll_no>', methods=['POST'])
 def delete_student(roll_no):
     if manager.delete_student(roll_no):
+        page_cache.clear()
         flash("Student deleted successfully!", "success")
     else:
         flash("Student not found.", "error")
     return redirect(url_for('display_students'))
 
+def _conditional_json(build, precheck=None):
+    """Answer 304 when the client's ETag matches the data version, without touching the students table.
+
+    ``precheck`` runs before the ETag is compared, so an invalid request
+    (a ValueError) or a missing student (a 404) is never answered with 304.
+    """
+    etag = f"students-{manager.data_version()}"
+    if precheck is not None:
+        precheck()
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    # Clients may keep the body but must revalidate; a 304 costs one indexed read
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.errorhandler(404)
+def not_found(error):
+    if request.path.startswith('/api/'):
+        return jsonify({'error': 'not found'}), 404
+    return error
+
+@app.route('/api/cache')
+def api_cache():
+    return jsonify(page_cache.stats())
+
+@app.route('/api/students')
+def api_students():
+    try:
+        page_size = min(max(int(request.args.get('per_page', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        sort_key = request.args.get('sort', 'roll_no')
+        after, before = request.args.get('after'), request.args.get('before')
+        # Validated before the ETag check, so a bad request is a 400 and never a 304
+        return _conditional_json(lambda: manager.get_students_page(
+            page_size=page_size, sort_key=sort_key, descending=request.args.get('order') == 'desc',
+            after=after, before=before, grade=request.args.get('grade'), gender=request.args.get('gender')),
+            precheck=lambda: check_page_query(page_size, sort_key, after, before))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/students/<int:roll_no>')
+def api_student(roll_no):
+    student = None
+
+    def lookup():
+        nonlocal student
+        student = manager.get_student(roll_no)
+        if student is None:
+            abort(404)
+    # One primary key read, also made on a revalidation so a deleted student is never a 304
+    return _conditional_json(lambda: student, precheck=lookup)
+
+def _json_integer(data, key):
+    # int() would truncate 3.7 and accept true as 1
+    value = data[key]
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError(f"{key} must be an integer")
+    return value
+
+def _prepare_student(data, partial=False):
+    """Validate one student from a JSON batch like the add and edit forms do, deriving total, percentage and grade."""
+    if not isinstance(data, dict):
+        raise ValueError("Each student must be a JSON object")
+    fields = ('roll_no', 'name', 'age', 'gender', 'marks')
+    unknown = set(data) - set(fields)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    missing = [] if partial else [key for key in fields if key not in data]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    student = {}
+    if 'roll_no' in data:
+        student['roll_no'] = _json_integer(data, 'roll_no')
+    if 'name' in data:
+        if not isinstance(data['name'], str):
+            raise ValueError("name must be a string")
+        student['name'] = validate_name(data['name'])
+    if 'age' in data:
+        student['age'] = _json_integer(data, 'age')
+    if 'gender' in data:
+        student['gender'] = str(data['gender']).upper()
+        if student['gender'] not in ['M', 'F']:
+            raise ValueError("Gender must be M or F")
+    if 'marks' in data:
+        marks = [float(mark) for mark in data['marks']]
+        if len(marks) != len(SUBJECTS):
+            raise ValueError(f"Expected {len(SUBJECTS)} marks, got {len(marks)}")
+        for subject, mark in zip(SUBJECTS, marks):
+            if mark < 0 or mark > MAX_MARKS_PER_SUBJECT:
+                raise ValueError(f"Marks for {subject} must be between 0 and {MAX_MARKS_PER_SUBJECT}")
+        student['marks'] = marks
+        student['total'] = calculate_total(marks)
+        student['percentage'] = calculate_percentage(student['total'], TOTAL_MAX_MARKS)
+        student['grade'] = assign_grade(student['percentage'])
+    return student
+
+@app.route('/api/students/batch', methods=['POST'])
+def api_students_batch():
+    """Apply ``add``, ``update`` and ``delete`` lists, each in one transaction with per-item results.
+
+    ``update`` items hold ``roll_no`` plus the fields to change. With
+    ``"atomic": true`` a list is committed only if every item in it succeeds.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not any(key in payload for key in ('add', 'update', 'delete')):
+        return jsonify({'error': "Expected a JSON object with 'add', 'update' or 'delete' lists"}), 400
+    operations = {key: payload.get(key) or [] for key in ('add', 'update', 'delete')}
+    if not all(isinstance(items, list) for items in operations.values()):
+        return jsonify({'error': "'add', 'update' and 'delete' must be lists"}), 400
+    atomic = bool(payload.get('atomic'))
+    results = {}
+    if operations['add']:
+        results['add'] = manager.add_students(operations['add'], atomic=atomic, prepare=_prepare_student)
+    if operations['update']:
+        def prepare_update(data):
+            if not isinstance(data, dict) or 'roll_no' not in data:
+                raise ValueError("Each update needs a roll_no")
+            return _prepare_student(data, partial=True)
+        results['update'] = manager.update_many(operations['update'], atomic=atomic, prepare=prepare_update)
+    if operations['delete']:
+        results['delete'] = manager.delete_many(operations['delete'], atomic=atomic,
+                                                prepare=lambda roll_no: _json_integer({'roll_no': roll_no}, 'roll_no'))
+    if any(result.applied for result in results.values()):
+        page_cache.clear()
+    failed = any(result.errors for result in results.values())
+    # Partial success is a 200 with the failures listed; 422 only when nothing was applied
+    status = 422 if failed and not any(result.applied for result in results.values()) else 200
+    return jsonify({key: result.as_dict() for key, result in results.items()}), status
+
+@app.route('/api/statistics')
+def api_statistics():
+    return _conditional_json(lambda: manager.statistics_snapshot().as_dict())
+
 if __name__ == '__main__':
+    init_db()
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)